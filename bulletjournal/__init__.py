@@ -0,0 +1,19 @@
+####################################
+# My Bullet Journal engine
+# The journal model and Plan My Day, importable without Tkinter, e.g.
+#   from bulletjournal import DayLog,Task,constructSchedule
+####################################
+
+from .intervals import *
+from .occupancy import *
+from .model import *
+from .solver import *
+from .planner import *
+from .store import *
+from .hittest import *
+from .batch import *
+from .jobs import *
+from .portfolio import *
+from .cache import *
+from .optimizer import *
+from .history import *
@@ -0,0 +1,95 @@
+####################################
+# My Bullet Journal - batch planning
+# Plans a range of days at once, solving the days side by side on a process pool.
+####################################
+
+import datetime,concurrent.futures
+from .model import DaySchedule
+from .solver import ScheduleSolver,minutesPerDay
+from .history import recordStep
+from .planner import getScheduleProblem,assignStarts,getStudyTask,getStudyTaskName,isTest,getFingerprint
+
+__all__=["planDays","findStudySessions","solveDay"]
+
+def planDays(journal,startDate,endDate,granularity=60,ordering="mostConstrained",timeLimit=0.5,
+    studyDays=3,studyHours="2",maxWorkers=None,chunkDays=14,cache=None,dayStart=8*60,dayEnd=minutesPerDay):
+    #plans every day from startDate to endDate, both included, and returns {date:DaySchedule}.
+    #Each test found in the range (or in the studyDays after it) gets a study session on each of
+    #the studyDays before it. Days don't share tasks, so they're solved in parallel; maxWorkers=1
+    #solves them one after another in this process instead.
+    #journal is a Journal or a JournalStore. Days are planned chunkDays at a time so a JournalStore
+    #never unloads a log that's still being planned. With a ScheduleCache, days that look like ones
+    #solved before aren't sent to the pool at all.
+    #Untimed items are only placed between dayStart and dayEnd (minutes since midnight), which by
+    #default leaves the night for sleep the way Plan My Day does with the earliest wake-up it offers.
+    #Everything it changes in the journal is undone as one step.
+    return recordStep(journal.history,planDaysInStep,journal,startDate,endDate,granularity,ordering,timeLimit,
+        studyDays,studyHours,maxWorkers,chunkDays,cache,dayStart,dayEnd)
+
+def planDaysInStep(journal,startDate,endDate,granularity,ordering,timeLimit,studyDays,studyHours,maxWorkers,
+    chunkDays,cache,dayStart,dayEnd):
+    studySessions=findStudySessions(journal,startDate,endDate,studyDays)
+    daySchedules={}
+    dates=[startDate+datetime.timedelta(days=i) for i in range((endDate-startDate).days+1)]
+    if maxWorkers==1: executor=None
+    else: executor=concurrent.futures.ProcessPoolExecutor(maxWorkers)
+    try:
+        for chunkStart in range(0,len(dates),chunkDays):
+            logs=[journal.getLog(date) for date in dates[chunkStart:chunkStart+chunkDays]]
+            problems=[]
+            for log in logs:
+                addStudySessions(log,studySessions.get(log.date,[]),studyHours)
+                problems.append(getScheduleProblem(log))
+            results=[None]*len(problems)
+            if cache!=None:
+                fingerprints=[getFingerprint(problem,(),granularity,ordering,False,dayStart,dayEnd) for problem in problems]
+                results=[cache.get(fingerprint) for fingerprint in fingerprints]
+            unsolved=[i for i in range(len(problems)) if results[i]==None]
+            specs=[(problems[i][3],problems[i][4],granularity,ordering,timeLimit,dayStart,dayEnd) for i in unsolved]
+            if executor==None: solved=map(solveDay,specs)
+            else: solved=executor.map(solveDay,specs)
+            for (i,(starts,finished)) in zip(unsolved,solved):
+                results[i]=starts
+                if cache!=None and finished: cache.put(fingerprints[i],starts)
+            for (log,problem,starts) in zip(logs,problems,results):
+                daySchedules[log.date]=getDaySchedule(log,problem,starts,dayStart,dayEnd)
+    finally:
+        if executor!=None: executor.shutdown()
+    return daySchedules
+
+def findStudySessions(journal,startDate,endDate,studyDays=3): #{date:[tests to study for that day]}
+    studySessions={}
+    for i in range((endDate-startDate).days+studyDays+1):
+        testDate=startDate+datetime.timedelta(days=i)
+        for item in journal.getLog(testDate).items.values():
+            if not isTest(item): continue
+            for daysBefore in range(1,studyDays+1):
+                studyDate=testDate-datetime.timedelta(days=daysBefore)
+                if startDate<=studyDate<=endDate:
+                    studySessions.setdefault(studyDate,[]).append(item)
+    return studySessions
+
+def addStudySessions(log,tests,studyHours):
+    names=set(item.name for item in log.items.values()) #don't add sessions twice when a range is replanned
+    for test in tests:
+        if getStudyTaskName(test) not in names:
+            log.addItem(getStudyTask(test,studyHours))
+            names.add(getStudyTaskName(test))
+
+def solveDay(spec): #runs in the worker processes, so it only gets and returns plain data
+    fixed,tasks,granularity,ordering,timeLimit,dayStart,dayEnd=spec
+    solver=ScheduleSolver(fixed,tasks,granularity,ordering,dayStart,dayEnd,timeLimit=timeLimit)
+    starts=solver.solveBest()
+    return (starts,not solver.outOfBudget)
+
+def getDaySchedule(log,problem,starts,dayStart,dayEnd):
+    midnight,schedule,itemsWithoutTimes,fixed,tasks=problem
+    daySched=DaySchedule()
+    daySched.date=midnight
+    daySched.dayStart,daySched.dayEnd=dayStart,dayEnd #so repairSchedule keeps to the same hours
+    daySched.unplaced=assignStarts(midnight,schedule,itemsWithoutTimes,starts)
+    untimedIds=set(item.itemId for item in itemsWithoutTimes)
+    for item in schedule:
+        daySched.addPeriod(item,planned=item.itemId in untimedIds)
+    daySched.markUpToDate(log)
+    return daySched
@@ -0,0 +1,37 @@
+####################################
+# My Bullet Journal - schedule cache
+# Remembers solved days so planning the same day again is instant.
+####################################
+
+import collections
+
+__all__=["ScheduleCache"]
+
+class ScheduleCache(object):
+    #solver results by day fingerprint (see getFingerprint in planner), keeping the maxEntries most
+    #recently used. Starts are copied in and out so callers can't change what's stored.
+    def __init__(self,maxEntries=128):
+        self.maxEntries=maxEntries
+        self.entries=collections.OrderedDict() #fingerprint -> {key:start}, least recently used first
+        self.numHits=0
+        self.numMisses=0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self,fingerprint): #None if the day hasn't been solved
+        if fingerprint not in self.entries:
+            self.numMisses+=1
+            return None
+        self.numHits+=1
+        self.entries.move_to_end(fingerprint)
+        return dict(self.entries[fingerprint])
+
+    def put(self,fingerprint,starts):
+        self.entries[fingerprint]=dict(starts)
+        self.entries.move_to_end(fingerprint)
+        while len(self.entries)>self.maxEntries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
@@ -0,0 +1,108 @@
+####################################
+# My Bullet Journal - undo history
+# Undo and redo for a whole journal, kept as the changes that were made rather than copies.
+####################################
+
+__all__=["History","recordStep"]
+
+class History(object):
+    #every log a Journal or JournalStore hands out records its changes here, as operations:
+    #  ("set",item,attribute,old value)  ("add",log,item)  ("delete",log,item)
+    #A step is the operations between startStep and finishStep (or a single one made outside of any
+    #step), and undoing it does their inverses, latest first. Doing those records the operations that
+    #redo them, so a step costs memory and time in proportion to what changed, however big the journal.
+    #Steps can be nested; only the outermost one ends up in the history.
+    def __init__(self,maxSteps=100):
+        self.maxSteps=maxSteps
+        self.undoSteps=[] #oldest first
+        self.redoSteps=[] #the next one to redo last
+        self.currentOps=[] #operations in the steps that have been started but not finished
+        self.stepStarts=[] #where each of those steps starts in currentOps, outermost first
+        self.replayOps=None #what undo, redo and discardStep are recording instead, while they run
+
+    def startStep(self):
+        self.stepStarts.append(len(self.currentOps))
+
+    def finishStep(self):
+        self.stepStarts.pop()
+        if len(self.stepStarts)==0 and len(self.currentOps)>0:
+            self.addStep(self.currentOps)
+            self.currentOps=[]
+
+    def discardStep(self): #undoes the innermost step so far and leaves it out of the history
+        start=self.stepStarts.pop()
+        ops=self.currentOps[start:]
+        del self.currentOps[start:]
+        self.replay(ops)
+
+    def addStep(self,ops):
+        self.undoSteps.append(ops)
+        if len(self.undoSteps)>self.maxSteps: del self.undoSteps[0]
+        self.redoSteps=[] #what was undone before this can't be redone on top of it
+
+    def record(self,op):
+        if self.replayOps!=None: self.replayOps.append(op)
+        elif len(self.stepStarts)>0: self.currentOps.append(op)
+        else: self.addStep([op])
+
+    def recordChange(self,item,attribute,oldValue):
+        self.record(("set",item,attribute,oldValue))
+
+    def recordAdd(self,log,item):
+        self.record(("add",log,item))
+
+    def recordDelete(self,log,item):
+        self.record(("delete",log,item))
+
+    def canUndo(self):
+        return len(self.undoSteps)>0 and len(self.stepStarts)==0
+
+    def canRedo(self):
+        return len(self.redoSteps)>0 and len(self.stepStarts)==0
+
+    def undo(self): #False if there's nothing to undo, or a step is still being made
+        if not self.canUndo(): return False
+        self.redoSteps.append(self.replay(self.undoSteps.pop()))
+        return True
+
+    def redo(self):
+        if not self.canRedo(): return False
+        self.undoSteps.append(self.replay(self.redoSteps.pop()))
+        return True
+
+    def replay(self,ops): #does the inverse of ops, latest first, and returns the operations that undo that
+        self.replayOps=[]
+        try:
+            for op in reversed(ops):
+                if op[0]=="set": setattr(op[1],op[2],op[3])
+                elif op[0]=="add": op[1].deleteItem(op[2])
+                elif op[0]=="delete": op[1].addItem(op[2])
+            return self.replayOps
+        finally: self.replayOps=None
+
+    def forgetLog(self,log):
+        #log is being dropped from memory, so steps that change it can't be undone any more, and
+        #neither can any step before them
+        for i in range(len(self.undoSteps)-1,-1,-1):
+            if History.changesLog(self.undoSteps[i],log):
+                del self.undoSteps[:i+1]
+                break
+        if any(History.changesLog(step,log) for step in self.redoSteps): self.redoSteps=[]
+
+    @staticmethod
+    def changesLog(ops,log):
+        for op in ops:
+            if op[1] is log or (op[0]=="set" and op[1].log is log): return True
+        return False
+
+def recordStep(history,function,*args):
+    #calls function as a single step of history, which can be None for logs without one, and undoes
+    #whatever it did if it raises
+    if history==None: return function(*args)
+    history.startStep()
+    try: result=function(*args)
+    except BaseException:
+        history.discardStep()
+        raise
+    history.finishStep()
+    return result
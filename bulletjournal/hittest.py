@@ -0,0 +1,35 @@
+####################################
+# My Bullet Journal - hit testing
+# Finds what was clicked on in a list of rows without looking at every row.
+####################################
+
+import bisect
+
+__all__=["RowHitIndex"]
+
+class RowHitIndex(object):
+    #rows are horizontal bands [y0,y1) that don't overlap, each with the x ranges [x0,x1) in it that
+    #can be clicked and the thing that gets clicked. Bands are kept sorted by y0, so finding the one
+    #under a click is a binary search however long the list gets.
+    def __init__(self,rows=()):
+        self.tops=[] #y0 of each band, sorted
+        self.rows=[] #(y0,y1,spans,target) for each band, in the same order
+        for (y0,y1,spans,target) in rows:
+            self.addRow(y0,y1,spans,target)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def addRow(self,y0,y1,spans,target):
+        i=bisect.bisect_right(self.tops,y0)
+        self.tops.insert(i,y0)
+        self.rows.insert(i,(y0,y1,list(spans),target))
+
+    def find(self,x,y): #the target of the row clicked at (x,y), or None
+        i=bisect.bisect_right(self.tops,y)-1
+        if i<0: return None
+        y0,y1,spans,target=self.rows[i]
+        if not y0<y<y1: return None
+        for (x0,x1) in spans:
+            if x0<x<x1: return target
+        return None
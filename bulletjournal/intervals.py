@@ -0,0 +1,99 @@
+####################################
+# My Bullet Journal - interval index
+# The busy parts of a day, for fast overlap checks and free time lookups.
+####################################
+
+import bisect
+
+__all__=["IntervalIndex"]
+
+class IntervalIndex(object):
+    #keeps the busy time as sorted, non-overlapping blocks. Each block remembers the intervals that
+    #were merged into it, so overlap checks are a binary search no matter how many tasks there are.
+    #Works with anything that can be compared and added, e.g. datetimes or minutes.
+    def __init__(self,intervals=()):
+        self.starts=[] #start of each block, sorted
+        self.ends=[] #end of each block, also sorted since blocks don't overlap
+        self.members=[] #the (start,end,task) intervals in each block
+        for (start,end,task) in intervals:
+            self.add(start,end,task)
+
+    def __len__(self):
+        return sum(len(members) for members in self.members)
+
+    def __iter__(self): #every interval, by start time
+        for members in self.members:
+            for interval in sorted(members,key=lambda interval:interval[0]):
+                yield interval
+
+    def getBlocks(self): #the intervals grouped into runs that overlap each other, by start time
+        return [sorted(members,key=lambda interval:interval[0]) for members in self.members]
+
+    def add(self,start,end,task=None):
+        if not start<end: return #empty intervals don't take up any time
+        first=bisect.bisect_right(self.ends,start) #first block that ends after start
+        last=bisect.bisect_left(self.starts,end) #first block that starts at or after end
+        members=[(start,end,task)]
+        if first<last: #merge every block the interval overlaps into one
+            start=min(start,self.starts[first])
+            end=max(end,self.ends[last-1])
+            for blockMembers in self.members[first:last]:
+                members.extend(blockMembers)
+        self.starts[first:last]=[start]
+        self.ends[first:last]=[end]
+        self.members[first:last]=[members]
+
+    def remove(self,start,end,task=None):
+        if not start<end: return
+        index=bisect.bisect_right(self.ends,start)
+        if index==len(self.starts) or self.starts[index]>start: return
+        members=self.members[index]
+        for i in range(len(members)):
+            if members[i][0]==start and members[i][1]==end and members[i][2] is task:
+                members.pop(i)
+                break
+        else: return
+        #what's left of the block might not overlap any more, so split it back up
+        starts,ends,blocks=[],[],[]
+        for interval in sorted(members,key=lambda interval:interval[0]):
+            if len(ends)>0 and interval[0]<ends[-1]:
+                ends[-1]=max(ends[-1],interval[1])
+                blocks[-1].append(interval)
+            else:
+                starts.append(interval[0])
+                ends.append(interval[1])
+                blocks.append([interval])
+        self.starts[index:index+1]=starts
+        self.ends[index:index+1]=ends
+        self.members[index:index+1]=blocks
+
+    def overlaps(self,start,end):
+        index=bisect.bisect_right(self.ends,start)
+        return index<len(self.starts) and self.starts[index]<end
+
+    def getConflicts(self,start,end): #the tasks whose intervals overlap [start,end)
+        conflicts=[]
+        index=bisect.bisect_right(self.ends,start)
+        while index<len(self.starts) and self.starts[index]<end:
+            for (memberStart,memberEnd,task) in self.members[index]:
+                if memberStart<end and start<memberEnd: conflicts.append(task)
+            index+=1
+        return conflicts
+
+    def findGap(self,earliest,latest,length): #the first start time from earliest on with length free time before latest
+        start=earliest
+        index=bisect.bisect_right(self.ends,start)
+        while index<len(self.starts) and self.starts[index]<start+length:
+            start=self.ends[index]
+            index+=1
+        return start if start+length<=latest else None
+
+    def getGaps(self,dayStart,dayEnd): #the free (start,end) intervals between dayStart and dayEnd
+        gaps=[]
+        start=dayStart
+        for index in range(bisect.bisect_right(self.ends,dayStart),len(self.starts)):
+            if self.starts[index]>=dayEnd: break
+            if start<self.starts[index]: gaps.append((start,self.starts[index]))
+            start=max(start,self.ends[index])
+        if start<dayEnd: gaps.append((start,dayEnd))
+        return gaps
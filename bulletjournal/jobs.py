@@ -0,0 +1,70 @@
+####################################
+# My Bullet Journal - planning jobs
+# Runs the schedule solver on a worker thread so the window stays responsive.
+####################################
+
+import threading,time
+from .planner import getScheduleProblem,assignStarts,getFingerprint,getSolver
+from .solver import minutesPerDay
+
+__all__=["PlanningJob"]
+
+class PlanningJob(object):
+    #plans log's untimed items in the background. The log is read when the job is made and only
+    #changed by finish, so make the job and finish it on the thread that owns the log (Tk's); the
+    #worker thread only sees plain numbers. With a SchedulePortfolio the worker thread just waits on
+    #the portfolio's processes. With a ScheduleCache, a day that's been planned before is done at once.
+    #optimize uses a ScheduleOptimizer on the thread to improve on the first schedule found.
+    #Untimed items are only placed between dayStart and dayEnd, like constructSchedule.
+    def __init__(self,log,granularity=60,ordering="mostConstrained",timeLimit=None,portfolio=None,
+        cache=None,answers=(),optimize=False,dayStart=0,dayEnd=minutesPerDay):
+        problem=getScheduleProblem(log)
+        self.midnight,self.schedule,self.itemsWithoutTimes,self.fixed,self.tasks=problem
+        self.granularity=granularity
+        self.timeLimit=timeLimit
+        self.portfolio=portfolio
+        self.optimize=optimize
+        self.dayStart,self.dayEnd=dayStart,dayEnd
+        self.solver=getSolver(problem,granularity,ordering,timeLimit,optimize=optimize,dayStart=dayStart,dayEnd=dayEnd)
+        self.cache=cache
+        self.starts=None
+        self.finished=False #whether the search ran to the end, so the result is worth caching
+        if cache!=None:
+            self.fingerprint=getFingerprint(problem,answers,granularity,ordering,optimize,dayStart,dayEnd)
+            self.starts=cache.get(self.fingerprint)
+        self.thread=threading.Thread(target=self.run)
+        self.thread.daemon=True #don't keep the app open if it's closed mid-plan
+
+    def start(self):
+        if self.starts==None: self.thread.start()
+        return self
+
+    def run(self):
+        if self.portfolio!=None:
+            deadline=None if self.timeLimit==None else time.monotonic()+self.timeLimit
+            starts=self.portfolio.solveBest(self.fixed,self.tasks,self.granularity,self.timeLimit,None,self.dayStart,self.dayEnd)
+            self.finished=len(starts)==len(self.tasks)
+            if self.optimize: #gets whatever's left of the time limit, so the job still takes timeLimit in all
+                if deadline!=None: self.solver.timeLimit=max(0,deadline-time.monotonic())
+                starts=self.solver.solveBest(starts)
+                self.finished=self.finished and not self.solver.outOfBudget
+        else:
+            starts=self.solver.solveBest()
+            self.finished=not self.solver.outOfBudget
+        self.starts=starts
+
+    def isDone(self):
+        return self.starts!=None
+
+    def cancel(self): #the worker stops at its next step; the log is left as it was
+        if self.portfolio!=None: self.portfolio.cancel()
+        self.solver.cancel()
+
+    def getNumTried(self): #how many partial schedules the solver has looked at so far, if it's here to ask
+        if self.portfolio!=None: return None
+        return self.solver.numNodes
+
+    def finish(self): #gives the items their times and returns (schedule,unplaced)
+        if self.cache!=None and self.finished: self.cache.put(self.fingerprint,self.starts)
+        unplaced=assignStarts(self.midnight,self.schedule,self.itemsWithoutTimes,self.starts)
+        return (self.schedule,unplaced)
@@ -0,0 +1,518 @@
+####################################
+# My Bullet Journal - journal model
+# Tasks, day logs, schedules and questions. Nothing in here needs Tkinter.
+####################################
+
+import datetime,bisect,copy,itertools
+from .intervals import IntervalIndex
+from .solver import minutesPerDay
+from .history import History
+
+__all__=["Item","Task","TaskEditor","DayLog","DaySchedule","Question","StudyQuestion","Journal",
+    "getDateIndex","addLog","getLog","migrateTask","getTimeStamp","getDayStamp","getStampTime"]
+
+markings=("incomplete","started","migrated","completed","cancelled")
+markingCodes={markings[i]:i for i in range(len(markings))}
+groupNames=[None] #group code -> group; every group any task has had gets a code once
+groupCodes={None:0}
+
+def getGroupCode(group):
+    if group not in groupCodes:
+        groupCodes[group]=len(groupNames)
+        groupNames.append(group)
+    return groupCodes[group]
+
+def getFieldMinutes(durationHour,durationMinute): #the duration in the edit screen's hour and minute fields
+    hours=int(durationHour) if str(durationHour).isdigit() else 0
+    minutes=int(durationMinute) if str(durationMinute).isdigit() else 0
+    return hours*60+minutes
+
+#times as stamps: whole minutes since midnight on 1/1/1, so that comparing, adding durations to and
+#overlapping them is plain int math however many days apart they are
+def getTimeStamp(time):
+    return time.toordinal()*minutesPerDay+time.hour*60+time.minute
+
+def getDayStamp(date): #the stamp of midnight at the start of date
+    return date.toordinal()*minutesPerDay
+
+def getStampTime(stamp):
+    return datetime.datetime.fromordinal(stamp//minutesPerDay)+datetime.timedelta(minutes=stamp%minutesPerDay)
+
+class TrackedAttribute(object):
+    #an Item attribute its DayLog keeps track of, so changing it bumps the versions and refiles the item.
+    #encode and decode turn values into what's stored and back, e.g. markings into small ints.
+    #Changes to items in a log with a History are recorded there so they can be undone.
+    def __init__(self,name,encode=None,decode=None):
+        self.name=name
+        self.attrName="_"+name
+        self.encode=encode
+        self.decode=decode
+
+    def __get__(self,item,owner):
+        if item is None: return self
+        value=getattr(item,self.attrName)
+        return value if self.decode==None else self.decode(value)
+
+    def __set__(self,item,value):
+        if item.log!=None and item.log.history!=None:
+            oldValue=self.__get__(item,type(item))
+            if oldValue!=value: item.log.history.recordChange(item,self.name,oldValue)
+        setattr(item,self.attrName,value if self.encode==None else self.encode(value))
+        item.version+=1
+        if item.log!=None: item.log.refileItem(item)
+
+class TimeAttribute(TrackedAttribute):
+    #assignedTime, which also keeps the item's startStamp in step with it before anything gets refiled
+    def __set__(self,item,value):
+        item._startStamp=None if value==None else getTimeStamp(value)
+        super().__set__(item,value)
+
+class Item(object):
+    #only what's saved is kept on an item, in slots rather than a __dict__ since a journal can have tens
+    #of thousands of them: the duration as whole minutes, the marking and group as small int codes.
+    #What the edit screen is in the middle of changing lives in a TaskEditor instead. The assigned
+    #time is also kept as a stamp, which is what sorting, the time indexes and Plan My Day work with.
+    __slots__=("_itemId","log","version","_name","_assignedTime","_startStamp","_group","_marking","_priority",
+        "_durationMinutes","timeCreated")
+    name=TrackedAttribute("name")
+    assignedTime=TimeAttribute("assignedTime")
+    group=TrackedAttribute("group",getGroupCode,groupNames.__getitem__)
+    marking=TrackedAttribute("marking",markingCodes.__getitem__,markings.__getitem__)
+    priority=TrackedAttribute("priority")
+    durationMinutes=TrackedAttribute("durationMinutes")
+    itemIds=itertools.count(1) #hands out each item's itemId
+
+    def __init__(self,name,assignedTime=None,group=None,marking="incomplete",durationMinutes=0,priority=False):
+        self._itemId=next(Item.itemIds)
+        self.log=None #the DayLog this item is filed in
+        self.version=0 #bumped every time the item changes
+        self.name=name
+        self.group=group
+        self.durationMinutes=durationMinutes
+        self.assignedTime=assignedTime
+        self.timeCreated=datetime.datetime.today()
+        self.marking=marking
+        self.priority=priority
+
+    #never changes, unlike the name or anything else the user can edit, so logs and schedules file
+    #items under it. Items are otherwise only equal to themselves.
+    @property
+    def itemId(self):
+        return self._itemId
+
+    def copy(self): #an unfiled copy that's an item of its own, with its own itemId
+        newItem=copy.deepcopy(self)
+        newItem._itemId=next(Item.itemIds)
+        return newItem
+
+    def __getstate__(self):
+        state={name:getattr(self,name) for name in Item.__slots__ if hasattr(self,name)}
+        state["log"]=None #a copy isn't filed in any log until it's added to one
+        return state
+
+    def __setstate__(self,state):
+        for name in state:
+            setattr(self,name,state[name])
+
+    @property
+    def duration(self):
+        return datetime.timedelta(minutes=self.durationMinutes)
+
+    @duration.setter
+    def duration(self,duration):
+        self.durationMinutes=int(duration.total_seconds())//60
+
+    @property
+    def startStamp(self): #None when the item has no assigned time, like the rest of these
+        return self._startStamp
+
+    @property
+    def endStamp(self):
+        return None if self._startStamp==None else self._startStamp+self.durationMinutes
+
+    @property
+    def startMinute(self): #minutes since midnight on the day it starts
+        return None if self._startStamp==None else self._startStamp%minutesPerDay
+
+    @property
+    def endMinute(self): #past minutesPerDay when it ends the next day
+        return None if self._startStamp==None else self.startMinute+self.durationMinutes
+
+    @property
+    def markingCode(self):
+        return self._marking
+
+    #which item is selected or being edited and where it's drawn are kept by its DayLog
+    @property
+    def selected(self):
+        return self.log!=None and self.log.selectedItem is self
+
+    @selected.setter
+    def selected(self,selected):
+        if self.log==None: return
+        if selected: self.log.selectItem(self)
+        elif self.selected: self.log.deselectAll()
+
+    @property
+    def isEditing(self):
+        return self.log!=None and self.log.editingItem is self
+
+    @isEditing.setter
+    def isEditing(self,isEditing):
+        if self.log==None: return
+        if isEditing: self.log.startEditingTask(self)
+        elif self.isEditing: self.log.stopEditingTask()
+
+    @property
+    def row(self):
+        return 0 if self.log==None else self.log.getRow(self)
+
+    def getColor(self,defaultColor):
+        groupDict=DayLog.groupDict
+        return groupDict[self.group] if self.group!=None else defaultColor
+
+    def getHourMinute(self):
+        if self._startStamp==None: return ":"
+        hour,minute=divmod(self.startMinute,60)
+        if hour<12:
+            hourStr=str(hour) if hour!=0 else "12"
+            ampmStr="AM"
+        else:
+            hourStr=str(int(hour)-12) if hour!=12 else str(int(hour))
+            ampmStr="PM"
+        minuteStr=str(minute)
+        if len(minuteStr)==1: minuteStr="0"+minuteStr
+        return hourStr+":"+minuteStr,ampmStr
+
+    def getDurationString(self):
+        return "%d hours and %d minutes" % (self.durationMinutes//60,self.durationMinutes%60)
+
+    def toggleGroup(self):
+        groupList=sorted(list(DayLog.groupDict))+[None]
+        nextIndex=groupList.index(self.group)+1 if self.group in groupList else 0
+        if nextIndex==len(groupList): nextIndex=0
+        self.group=groupList[nextIndex]
+
+    def togglePriority(self):
+        self.priority=not self.priority
+
+class Task(Item):
+    __slots__=()
+
+    def __init__(self,name,durationHour="0",durationMinute="0",assignedTime=None,group=None,marking="incomplete",priority=False):
+        super().__init__(name,assignedTime,group,marking,getFieldMinutes(durationHour,durationMinute),priority)
+
+    def __repr__(self):
+        return "Task %s" % (self.name)
+
+class TaskEditor(object):
+    #what the edit screen has typed or picked for task but not put into it yet
+    def __init__(self,task):
+        self.task=task
+        self.durationHour=str(task.durationMinutes//60)
+        self.durationMinute=str(task.durationMinutes%60)
+        if task.startStamp==None: self.selectedHour,self.selectedMinute,self.selectedAMPM=1,0,"AM"
+        else:
+            hour,minute=divmod(task.startMinute,60)
+            self.selectedHour=hour%12 if hour%12!=0 else 12
+            self.selectedMinute=minute//5*5
+            self.selectedAMPM="AM" if hour<12 else "PM"
+
+    def updateDuration(self): #checks the duration fields, and if they're valid, sets the task's duration from them
+        if not (self.durationHour.isdigit() and self.durationMinute.isdigit()): return False
+        if self.durationHour.startswith("0") and self.durationMinute=="0": return False
+        if self.durationMinute!="0" and  self.durationMinute.startswith("0"): return False
+        if int(self.durationHour)>24 or int(self.durationMinute)>60: return False
+        self.task.durationMinutes=getFieldMinutes(self.durationHour,self.durationMinute)
+        return True
+
+    def getSelectedTime(self,date): #the picked hour, minute and AM/PM on date
+        if self.selectedAMPM=="AM": hour=0 if self.selectedHour==12 else self.selectedHour
+        else: hour=12 if self.selectedHour==12 else self.selectedHour+12
+        return datetime.datetime(date.year,date.month,date.day,hour,self.selectedMinute)
+
+class DayLog(object):
+    groupDict={"school":"khaki","extracurricular":"mediumpurple","health":"lightcyan","personal":"palegreen"}
+    invertedMarkingDict=dict(enumerate(markings)) #marking code -> marking
+    sortModes=["name","assignedTime","timeCreated","group","priority","marking"]
+
+    def __init__(self,date):
+        self.date=date
+        self.items={} #itemId -> item
+        #one list per sort mode of (sortKey,item) pairs, kept in order as items are added, changed and deleted
+        self.sortedIndexes={sortMode:[] for sortMode in DayLog.sortModes}
+        self.sortKeys={} #itemId -> the key each index currently files the item under, in sortModes order
+        self.addOrder={} #itemId -> when the item was added, used to break ties
+        self.numItemsAdded=0
+        self.version=0 #bumped every time an item is added, deleted or changed
+        self.sortedListCache=None #(version,sortMode,itemList,positions) from the last getSortedList, for rows
+        self.selectedItem=None #the item whose dropdown is open
+        self.editingItem=None #the item open in the edit screen
+        self.timeIndex=IntervalIndex() #when the items with an assigned time take place, as stamps
+        self.timedIntervals={} #itemId -> the (start,end) the item is filed under in timeIndex
+        self.history=None #the History adding, deleting and changing items is recorded in, if any
+
+    def __repr__(self):
+        return "DayLog %s" % self.date
+
+    def addItem(self,*args):
+        for item in args:
+            if isinstance(item,Item) and item.itemId not in self.items:
+                self.items[item.itemId]=item
+                item.log=self
+                self.addOrder[item.itemId]=self.numItemsAdded
+                self.numItemsAdded+=1
+                self.fileItem(item)
+                self.version+=1
+                if self.history!=None: self.history.recordAdd(self,item)
+
+    def deleteItem(self,item):
+        if self.items.get(item.itemId) is item:
+            if self.selectedItem is item: self.deselectAll()
+            if self.editingItem is item: self.stopEditingTask()
+            del self.items[item.itemId]
+            self.unfileItem(item)
+            del self.addOrder[item.itemId]
+            item.log=None
+            self.version+=1
+            if self.history!=None: self.history.recordDelete(self,item)
+
+    def getItem(self,itemId):
+        return self.items.get(itemId)
+
+    def getSortKey(self,item,sortMode):
+        order=self.addOrder[item.itemId]
+        if sortMode=="name": return (item.name,order)
+        elif sortMode=="assignedTime": #untimed items go last
+            stamp=item.startStamp
+            return (stamp==None,0 if stamp==None else stamp,order)
+        elif sortMode=="timeCreated": return (item.timeCreated,order)
+        elif sortMode=="group": return (DayLog.getGroupIndex(item.group),order)
+        elif sortMode=="priority": return (not item.priority,order)
+        elif sortMode=="marking": return (item.markingCode,order)
+
+    @staticmethod
+    def getGroupIndex(group):
+        groupList=sorted(list(DayLog.groupDict))+[None]
+        return groupList.index(group)
+
+    def fileItem(self,item): #binary insertion into every index
+        keys=[self.getSortKey(item,sortMode) for sortMode in DayLog.sortModes]
+        for m in range(len(DayLog.sortModes)):
+            bisect.insort(self.sortedIndexes[DayLog.sortModes[m]],(keys[m],item))
+        self.sortKeys[item.itemId]=keys
+        self.fileItemTime(item)
+
+    def unfileItem(self,item):
+        keys=self.sortKeys.pop(item.itemId)
+        for m in range(len(DayLog.sortModes)):
+            index=self.sortedIndexes[DayLog.sortModes[m]]
+            del index[bisect.bisect_left(index,(keys[m],))]
+        self.unfileItemTime(item)
+
+    def fileItemTime(self,item):
+        if item.startStamp!=None:
+            interval=(item.startStamp,item.endStamp)
+            self.timeIndex.add(interval[0],interval[1],item)
+            self.timedIntervals[item.itemId]=interval
+
+    def unfileItemTime(self,item):
+        interval=self.timedIntervals.pop(item.itemId,None)
+        if interval!=None: self.timeIndex.remove(interval[0],interval[1],item)
+
+    def getConflicts(self,item): #the other items whose times overlap item's
+        if item.startStamp==None: return []
+        conflicts=self.timeIndex.getConflicts(item.startStamp,item.endStamp)
+        return [conflict for conflict in conflicts if conflict is not item]
+
+    def refileItem(self,item): #called whenever an attribute the indexes sort by changes
+        keys=self.sortKeys.get(item.itemId)
+        if keys==None: return #item is still being constructed
+        self.version+=1
+        for m in range(len(DayLog.sortModes)):
+            newKey=self.getSortKey(item,DayLog.sortModes[m])
+            if newKey!=keys[m]:
+                index=self.sortedIndexes[DayLog.sortModes[m]]
+                del index[bisect.bisect_left(index,(keys[m],))]
+                bisect.insort(index,(newKey,item))
+                keys[m]=newKey
+        interval=self.timedIntervals.get(item.itemId)
+        if item.startStamp==None or interval!=(item.startStamp,item.endStamp):
+            self.unfileItemTime(item)
+            self.fileItemTime(item)
+
+    def getSortedList(self,sortMode):
+        cache=self.sortedListCache
+        #nothing has changed since the last call, so the list is still right
+        if cache!=None and cache[0]==self.version and cache[1]==sortMode: return cache[2]
+        itemList=[item for (key,item) in self.sortedIndexes[sortMode]]
+        positions={itemList[i].itemId:i for i in range(len(itemList))}
+        self.sortedListCache=(self.version,sortMode,itemList,positions)
+        return itemList
+
+    def getRow(self,item):
+        #where item is in the list getSortedList last gave out, leaving room under the selected item for
+        #its dropdown. Worked out from the list positions, so changing the selection doesn't move anything
+        if self.sortedListCache==None: return 0
+        positions=self.sortedListCache[3]
+        index=DayLog.getListIndex(positions,item,0)
+        selectedIndex=DayLog.getListIndex(positions,self.selectedItem,len(positions))
+        return index+1 if index>selectedIndex else index
+
+    @staticmethod
+    def getListIndex(positions,item,default): #where item is in a sorted list, or default if it isn't
+        if item==None: return default
+        return positions.get(item.itemId,default)
+
+    def getSelectedTask(self):
+        return self.selectedItem
+
+    def selectItem(self,item):
+        self.selectedItem=item
+
+    def deselectAll(self):
+        self.selectItem(None)
+
+    def getEditingTask(self):
+        return self.editingItem
+
+    def startEditingTask(self,item):
+        self.editingItem=item
+
+    def stopEditingTask(self):
+        self.editingItem=None
+
+class DaySchedule(object):
+    def __init__(self):
+        self.startTime=datetime.time(hour=0,minute=0)
+        self.endTime=datetime.time(hour=23,minute=59)
+        self.dayLength=datetime.timedelta(hours=24)
+        self.date=datetime.datetime.today()
+        self.questions=[]
+        self.schedule=[]
+        self.busy=IntervalIndex() #when the periods in schedule take place, as stamps
+        self.unplaced=[] #tasks Plan My Day couldn't find time for
+        self.sleepQuestion=None
+        self.sleepTime=None
+        self.sleepTask=None #the task the sleep question added, if Plan My Day asked it
+        #the minutes since midnight Plan My Day places tasks between, which start once the user's awake
+        self.dayStart=0
+        self.dayEnd=minutesPerDay
+        #what the schedule was made from, so repairSchedule can tell what changed since
+        self.log=None
+        self.logVersion=None
+        self.periodVersions={} #itemId -> the task's version when it was scheduled
+        self.periodIntervals={} #itemId -> the (start,end) it's filed under in busy
+        self.plannedIds=set() #ids of the tasks Plan My Day picked times for, which it's free to move
+
+    def addQuestion(self,*questions):
+        for question in questions:
+            self.questions.append(question)
+
+    def addPeriod(self,task,planned=False):
+        self.schedule.append(task)
+        self.busy.add(task.startStamp,task.endStamp,task)
+        self.periodVersions[task.itemId]=task.version
+        self.periodIntervals[task.itemId]=(task.startStamp,task.endStamp)
+        if planned: self.plannedIds.add(task.itemId)
+
+    def removePeriod(self,task):
+        for i in range(len(self.schedule)):
+            if self.schedule[i] is task:
+                self.schedule.pop(i)
+                break
+        start,end=self.periodIntervals.pop(task.itemId)
+        self.busy.remove(start,end,task)
+        del self.periodVersions[task.itemId]
+        self.plannedIds.discard(task.itemId)
+
+    def getStartStamp(self): #when the day the schedule covers starts
+        return getDayStamp(self.date)+self.startTime.hour*60+self.startTime.minute
+
+    def isPlanned(self,task):
+        return task.itemId in self.plannedIds
+
+    def markUpToDate(self,log):
+        self.log=log
+        self.logVersion=log.version
+
+    def isUpToDate(self,log):
+        return self.log is log and self.logVersion==log.version
+
+    def isEmpty(self):
+        if self.schedule==None or len(self.schedule)==0: return True
+        else: return False
+
+class Question(object):
+    def __init__(self,question=""):
+        self.question=question
+        self.possibleAnswers=[] #answer choices for the user
+        self.answer=None #actual answer the user gave
+
+    def __repr__(self):
+        return self.question
+
+    def addAnswer(self,answer):
+        self.answer=answer
+
+    def addPossibleAnswer(self,*possibleAnswers):
+        for possibleAnswer in possibleAnswers:
+            self.possibleAnswers.append(possibleAnswer)
+
+class StudyQuestion(Question):
+    def __init__(self,question,item):
+        super().__init__(question)
+        self.test=item
+
+class Journal(object): #every day's log, kept in memory in date order
+    def __init__(self):
+        self.logList=[]
+        self.history=History() #undo and redo across every log
+
+    def getLog(self,date):
+        log=getLog(self.logList,date)
+        log.history=self.history
+        return log
+
+####################################
+# Log list functions
+####################################
+
+def getDateIndex(logList,date,returnAppendLocationIfNotFound=False):
+    #binary search algorithm adapted from
+    #https://interactivepython.org/runestone/static/pythonds/SortSearch/TheBinarySearch.html
+    first=0
+    last=len(logList)-1
+    found=False
+    while first<=last and not found:
+        midpoint=(first+last)//2
+        if logList[midpoint].date==date: found=True
+        else:
+            if date<logList[midpoint].date: last=midpoint-1
+            else: first=midpoint+1
+    if found: return midpoint
+    elif returnAppendLocationIfNotFound: return first
+    else: return None
+
+def addLog(logList,log):
+    index=getDateIndex(logList,log.date,True)
+    logList.insert(index,log)
+
+def getLog(logList,date): #returns the log for date, making it if it hasn't been made yet
+    index=getDateIndex(logList,date)
+    if index!=None: return logList[index]
+    log=DayLog(date)
+    addLog(logList,log)
+    return log
+
+def migrateTask(journal,log,task): #keeps the next day's log in sync with whether task is marked "migrated"
+    newLog=journal.getLog(log.date+datetime.timedelta(days=1))
+    if task.marking=="migrated":
+        if any(item.name==task.name for item in newLog.items.values()): return #already migrated
+        newTask=task.copy()
+        newTask.marking="incomplete"
+        newLog.addItem(newTask)
+    else: #if task is not migrated, make sure it's not in tomorrow's log
+        for item in list(newLog.items.values()):
+            if item.name==task.name:
+                newLog.deleteItem(item)
@@ -0,0 +1,72 @@
+####################################
+# My Bullet Journal - occupancy map
+# A day as one bit per minute, for testing every start time of a task at once.
+####################################
+
+__all__=["OccupancyMap"]
+
+class OccupancyMap(object):
+    #bit i of busy is set when minute i is taken. Python ints can be as long as they need to be, so
+    #a whole day fits in one number and shifting/and-ing it checks every minute in a single step.
+    #Doesn't count overlaps: releasing a range frees it even if something else also took it.
+    gridMasks={} #(numMinutes,granularity,offset) -> bits at the start times on that grid
+
+    def __init__(self,numMinutes=24*60,intervals=()):
+        self.numMinutes=numMinutes
+        self.fullMask=(1<<numMinutes)-1
+        self.busy=0
+        for (start,end) in intervals:
+            self.occupy(start,end)
+
+    def getMask(self,start,end): #bits start to end-1, clipped to the day
+        start,end=max(start,0),min(end,self.numMinutes)
+        if end<=start: return 0
+        return ((1<<(end-start))-1)<<start
+
+    def occupy(self,start,end):
+        self.busy|=self.getMask(start,end)
+
+    def release(self,start,end):
+        self.busy&=~self.getMask(start,end)
+
+    def isFree(self,start,end):
+        return start>=0 and end<=self.numMinutes and self.busy&self.getMask(start,end)==0
+
+    def getFreeMinutes(self):
+        return self.numMinutes-bin(self.busy).count("1")
+
+    def getStartMask(self,duration,granularity=1,offset=0):
+        #bit s is set when [s,s+duration) is free and s is on the grid. Ands the free bits with copies
+        #of themselves shifted by 1,2,4... so it takes log(duration) steps instead of duration
+        free=~self.busy&self.fullMask
+        if duration>0:
+            window=1
+            while window*2<=duration:
+                free&=free>>window
+                window*=2
+            if window<duration: free&=free>>(duration-window)
+        else: free=self.fullMask|(1<<self.numMinutes) #zero length tasks can start anywhere, even at the end
+        return free&self.getGridMask(granularity,offset)
+
+    def getGridMask(self,granularity,offset):
+        key=(self.numMinutes,granularity,offset%granularity)
+        if key not in OccupancyMap.gridMasks:
+            gridMask=0
+            for minute in range(offset%granularity,self.numMinutes+1,granularity):
+                gridMask|=1<<minute
+            OccupancyMap.gridMasks[key]=gridMask
+        return OccupancyMap.gridMasks[key]
+
+    def getStarts(self,duration,granularity=1,offset=0): #every start time that fits, earliest first
+        startMask=self.getStartMask(duration,granularity,offset)
+        starts=[]
+        while startMask!=0:
+            lowestBit=startMask&-startMask
+            starts.append(lowestBit.bit_length()-1)
+            startMask^=lowestBit
+        return starts
+
+    def getFirstStart(self,duration,granularity=1,offset=0,earliest=0): #None if it doesn't fit anywhere
+        startMask=self.getStartMask(duration,granularity,offset)>>max(earliest,0)
+        if startMask==0: return None
+        return max(earliest,0)+(startMask&-startMask).bit_length()-1
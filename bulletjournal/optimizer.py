@@ -0,0 +1,191 @@
+####################################
+# My Bullet Journal - optimizing scheduler
+# Looks for the best schedule rather than the first one that fits, by branch and bound.
+####################################
+
+import time
+from .solver import ScheduleSolver,minutesPerDay
+
+__all__=["ScheduleOptimizer"]
+
+class ScheduleOptimizer(object):
+    #fixed is a list of (start,end,group) and tasks a list of (key,duration,group,priority), in minutes
+    #since midnight like ScheduleSolver. A schedule costs:
+    #  priorityWeight for every hour into the day a priority task starts at
+    #  groupWeight every time one item's group differs from the one before it
+    #  gapWeight for every stretch of free time between two items that's at least a slot long (shorter
+    #  ones are just rounding to the grid and can't be used anyway)
+    #so priority work goes early, groups get clustered and the day isn't broken up.
+    #
+    #ScheduleSolver finds a schedule first, which is the one to beat. Then the day is built up again
+    #from the morning, one gap between fixed items at a time: the next task goes at the first slot
+    #after the last one, or the rest of the gap is left free (or, before anything's been placed, the
+    #day starts a slot later). Branches are cut when a lower bound on
+    #their cost can't beat the best schedule so far:
+    #  the remaining priority tasks can at best go back to back, shortest first, from the next slot
+    #  each remaining group other than the current one needs at least one switch into it
+    #and when the remaining tasks can't fit in the remaining slots. Reaching the same point in the
+    #day with the same tasks left but a higher cost is also cut.
+    #
+    #Has the same timeLimit/nodeLimit/cancel/solveBest as ScheduleSolver; out of budget, the best
+    #schedule found so far is returned. Tasks the solver couldn't fit at all are left out.
+    def __init__(self,fixed,tasks,granularity=60,dayStart=0,dayEnd=minutesPerDay,timeLimit=None,nodeLimit=None,
+        priorityWeight=10,groupWeight=2,gapWeight=1):
+        self.fixed=sorted((max(start,dayStart),min(end,dayEnd),group) for (start,end,group) in fixed
+            if max(start,dayStart)<min(end,dayEnd))
+        self.tasks=list(tasks)
+        self.granularity=granularity
+        self.dayStart=dayStart
+        self.priorityWeight=priorityWeight
+        self.groupWeight=groupWeight
+        self.gapWeight=gapWeight
+        self.timeLimit=timeLimit
+        self.nodeLimit=nodeLimit
+        self.deadline=None
+        self.outOfBudget=False
+        self.cancelled=False
+        self.numNodes=0
+        self.feasibilitySolver=ScheduleSolver([(start,end) for (start,end,group) in self.fixed],
+            [(i,self.tasks[i][1]) for i in range(len(self.tasks))],granularity,dayStart=dayStart,dayEnd=dayEnd,
+            timeLimit=timeLimit,nodeLimit=nodeLimit)
+        self.gaps=self.feasibilitySolver.gaps
+        #the fixed items before the first gap, and after each gap up to the next one
+        self.leadingItems=[item for item in self.fixed if len(self.gaps)==0 or item[0]<self.gaps[0][0]]
+        self.blockItems=[]
+        for gap in range(len(self.gaps)):
+            nextGapStart=self.gaps[gap+1][0] if gap+1<len(self.gaps) else dayEnd
+            self.blockItems.append([item for item in self.fixed if self.gaps[gap][1]<=item[0]<nextGapStart])
+        #free slots in each gap and all the gaps after it, for the feasibility bound
+        self.slotsFrom=[0]*(len(self.gaps)+1)
+        for gap in range(len(self.gaps)-1,-1,-1):
+            self.slotsFrom[gap]=self.slotsFrom[gap+1]+self.feasibilitySolver.gapSlots[gap]
+
+    def cancel(self):
+        self.cancelled=True
+        self.feasibilitySolver.cancel()
+
+    def solveBest(self,initialStarts=None): #{key:start}; initialStarts is a schedule to improve on, if there is one
+        if self.timeLimit!=None: self.deadline=time.monotonic()+self.timeLimit
+        if initialStarts!=None:
+            positions={self.tasks[i][0]:i for i in range(len(self.tasks))}
+            starts={positions[key]:initialStarts[key] for key in initialStarts}
+        else:
+            starts=self.feasibilitySolver.solveBest()
+            self.numNodes=self.feasibilitySolver.numNodes
+        self.bestStarts=starts
+        self.bestCost=self.getCost(starts)
+        if len(self.gaps)>0 and not self.isOutOfBudget():
+            #tasks with the same duration, group and priority are interchangeable, so branch on kinds
+            self.kinds={}
+            for task in starts:
+                key,duration,group,priority=self.tasks[task]
+                self.kinds.setdefault((duration,group,bool(priority)),[]).append(task)
+            self.placed=[] #(task,start) on the current branch
+            self.bestCosts={} #state -> the lowest cost it's been reached with
+            cost,lastGroup,hasItem=self.passItems(self.leadingItems,self.dayStart,None,False)
+            self.search(0,self.gaps[0][0],lastGroup,hasItem,len(starts),cost)
+        return {self.tasks[task][0]:start for (task,start) in self.bestStarts.items()}
+
+    def search(self,gap,time,lastGroup,hasItem,numLeft,cost):
+        self.numNodes+=1
+        if numLeft==0:
+            cost+=self.getTailCost(gap,time,lastGroup,hasItem)
+            if cost<self.bestCost:
+                self.bestCost=cost
+                self.bestStarts=dict(self.placed)
+            return
+        if self.isOutOfBudget(): return
+        start=self.getFirstSlot(time)
+        if cost+self.getBound(gap,start,lastGroup,hasItem)>=self.bestCost: return
+        state=(gap,time,lastGroup,hasItem,tuple(len(tasks) for tasks in self.kinds.values()))
+        if self.bestCosts.get(state,float("inf"))<=cost: return
+        self.bestCosts[state]=cost
+        gapEnd=self.gaps[gap][1]
+        for kind in self.getKindOrder(lastGroup):
+            duration,group,priority=kind
+            if start+duration>gapEnd: continue
+            addedCost=0
+            if priority: addedCost+=self.priorityWeight*start/60
+            if hasItem and group!=lastGroup: addedCost+=self.groupWeight
+            if hasItem and start-time>=self.granularity: addedCost+=self.gapWeight
+            task=self.kinds[kind].pop()
+            self.placed.append((task,start))
+            self.search(gap,start+duration,group,True,numLeft-1,cost+addedCost)
+            self.placed.pop()
+            self.kinds[kind].append(task)
+        if not hasItem and start+self.granularity<gapEnd:
+            #free time before the first item doesn't count, so the day can also start a slot later
+            self.search(gap,start+self.granularity,lastGroup,hasItem,numLeft,cost)
+        if gap+1<len(self.gaps): #leave the rest of this gap free
+            addedCost,lastGroup,hasItem=self.passItems(self.blockItems[gap],time,lastGroup,hasItem)
+            self.search(gap+1,self.gaps[gap+1][0],lastGroup,hasItem,numLeft,cost+addedCost)
+
+    def getKindOrder(self,lastGroup): #priority first, then the current group, then longest
+        kinds=[kind for kind in self.kinds if len(self.kinds[kind])>0]
+        return sorted(kinds,key=lambda kind:(not kind[2],kind[1]!=lastGroup,-kind[0]))
+
+    def getBound(self,gap,start,lastGroup,hasItem): #the least the remaining tasks could add to the cost
+        durations=[]
+        priorityDurations=[]
+        groups=set()
+        for kind in self.kinds:
+            for task in self.kinds[kind]:
+                durations.append(kind[0])
+                groups.add(kind[1])
+                if kind[2]: priorityDurations.append(kind[0])
+        slotsLeft=self.slotsFrom[gap+1]+max(0,self.gaps[gap][1]-start+self.granularity-1)//self.granularity
+        if sum(-(-duration//self.granularity) for duration in durations)>slotsLeft: return float("inf")
+        bound=0
+        for duration in sorted(priorityDurations):
+            bound+=self.priorityWeight*start/60
+            start+=duration
+        if hasItem: bound+=self.groupWeight*len(groups-{lastGroup})
+        else: bound+=self.groupWeight*max(0,len(groups)-1)
+        return bound
+
+    def passItems(self,items,time,lastGroup,hasItem): #the cost of going past fixed items from time on
+        cost=0
+        end=time
+        for (itemStart,itemEnd,group) in items:
+            if hasItem and itemStart-end>=self.granularity: cost+=self.gapWeight
+            if hasItem and group!=lastGroup: cost+=self.groupWeight
+            end=max(end,itemEnd)
+            lastGroup=group
+            hasItem=True
+        return (cost,lastGroup,hasItem)
+
+    def getTailCost(self,gap,time,lastGroup,hasItem): #the cost of the fixed items left once every task is placed
+        cost=0
+        for laterGap in range(gap,len(self.gaps)):
+            if laterGap>gap: time=self.gaps[laterGap][0]
+            addedCost,lastGroup,hasItem=self.passItems(self.blockItems[laterGap],time,lastGroup,hasItem)
+            cost+=addedCost
+        return cost
+
+    def getCost(self,starts): #the cost of a schedule given as {task:start}, added up the same way search does
+        items=[(start,end,group,False,1) for (start,end,group) in self.fixed]
+        for task in starts:
+            key,duration,group,priority=self.tasks[task]
+            items.append((starts[task],starts[task]+duration,group,priority,0))
+        items.sort(key=lambda item:(item[0],item[4])) #a task and a fixed item can only share a start if the task is empty
+        cost=0
+        end=self.dayStart
+        lastGroup,hasItem=None,False
+        for (start,itemEnd,group,priority,isFixed) in items:
+            if priority: cost+=self.priorityWeight*start/60
+            if hasItem and start-end>=self.granularity: cost+=self.gapWeight
+            if hasItem and group!=lastGroup: cost+=self.groupWeight
+            end=max(end,itemEnd)
+            lastGroup=group
+            hasItem=True
+        return cost
+
+    def isOutOfBudget(self):
+        if (self.cancelled or self.feasibilitySolver.outOfBudget
+            or (self.nodeLimit!=None and self.numNodes>self.nodeLimit)
+            or (self.deadline!=None and time.monotonic()>self.deadline)):
+            self.outOfBudget=True
+        return self.outOfBudget
+
+    def getFirstSlot(self,time):
+        return self.feasibilitySolver.getFirstSlot(time)
@@ -0,0 +1,258 @@
+####################################
+# My Bullet Journal - Plan My Day
+# The questions Plan My Day asks and the scheduler. Nothing in here needs Tkinter.
+####################################
+
+import datetime,time
+from .model import Task,Question,StudyQuestion,getDayStamp,getTimeStamp
+from .solver import ScheduleSolver,minutesPerDay
+from .optimizer import ScheduleOptimizer
+from .occupancy import OccupancyMap
+from .history import recordStep
+
+__all__=["testKeyWords","createQuestions","getSleepQuestion","getStudyQuestion","getAnswerTasks",
+    "getStudyTask","getStudyTaskName","isTest","scheduleBlank","scheduleStale","constructSchedule","constructBestSchedule","solveProblem","getSolver","getFingerprint","repairSchedule","getOccupancy","getFreeStarts","getNextFreeTime","getDateTimeFromString"]
+
+testKeyWords=["exam","Exam","test","Test","quiz","Quiz","assessment","Assessment"]
+
+def createQuestions(daySched,journal,todayLog):
+    #study question
+    tomorrowLog=journal.getLog(todayLog.date+datetime.timedelta(days=1))
+    for item in tomorrowLog.items.values():
+        if isTest(item):
+            studyQuestion=getStudyQuestion(item)
+            daySched.addQuestion(studyQuestion)
+    #sleep question
+    daySched.sleepQuestion=getSleepQuestion()
+    daySched.addQuestion(daySched.sleepQuestion)
+
+def getSleepQuestion(): #determines when user should go to bed to get 8 hours of sleep
+    text="What time do you plan on waking up tomorrow?"
+    question=Question(text)
+    question.addPossibleAnswer("8:00 AM","8:30 AM","9:00 AM","9:30 AM","10:00 AM")
+    return question
+
+def getStudyQuestion(item):
+    text="Do you want to find time to study for tomorrow's %s?" % item.name
+    question=StudyQuestion(text,item)
+    question.addPossibleAnswer("Yes","No")
+    return question
+
+def getAnswerTasks(daySched,date): #the tasks the answers call for, starting with the sleep task
+    wakeTime=getDateTimeFromString(date,daySched.sleepQuestion.answer)
+    daySched.sleepTime=wakeTime-datetime.timedelta(hours=8)
+    #nothing gets planned before waking up, even if there's room before going to sleep
+    daySched.dayStart=min(max(getTimeStamp(wakeTime)-getDayStamp(date),0),minutesPerDay)
+    sleepTask=Task("Sleep",assignedTime=daySched.sleepTime,durationHour="8",group="health")
+    daySched.sleepTask=sleepTask
+    tasks=[sleepTask]
+    for question in daySched.questions: #add the study periods as tasks
+        if isinstance(question,StudyQuestion):
+            if question.answer=="Yes":
+                tasks.append(getStudyTask(question.test))
+    return tasks
+
+def getStudyTask(test,durationHour="2"):
+    return Task(getStudyTaskName(test),durationHour=durationHour,group="school")
+
+def getStudyTaskName(test):
+    return "Study for %s" % test.name
+
+def isTest(item):
+    if item.name.startswith(getStudyTaskName(Task(""))): return False #studying for a test isn't one
+    for word in testKeyWords:
+        if word in item.name: return True
+    return False
+
+def scheduleBlank(schedule):
+    if schedule==None: return True
+    for task in schedule:
+        if task.assignedTime==None: return True
+    return False
+
+def scheduleStale(daySched,log):
+    #whether the plan was taken back out of log (e.g. undone) so that repairing it would plan the day
+    #again without the answers it was made from: the sleep task is gone, or nothing planned has a time
+    if daySched.sleepTask!=None and daySched.sleepTask.log is not log: return True
+    planned=[task for task in daySched.schedule if daySched.isPlanned(task)]
+    return len(planned)>0 and all(task.log is not log or task.startStamp==None for task in planned)
+
+def constructSchedule(log,granularity=60,ordering="mostConstrained",timeLimit=None,nodeLimit=None,portfolio=None,
+    cache=None,answers=(),optimize=False,dayStart=0,dayEnd=minutesPerDay): #backtracking!
+    #with a SchedulePortfolio, several solvers race each other on other processes instead. With
+    #optimize, a ScheduleOptimizer then looks for the best schedule instead of settling for the first.
+    #Untimed items are only placed between dayStart and dayEnd, in minutes since midnight.
+    midnight,schedule,itemsWithoutTimes,fixed,tasks=problem=getScheduleProblem(log)
+    starts=solveProblem(problem,granularity,ordering,timeLimit,nodeLimit,portfolio,cache,answers,optimize,dayStart,dayEnd)
+    if len(starts)<len(tasks): return None
+    recordStep(log.history,assignStarts,midnight,schedule,itemsWithoutTimes,starts) #undone all at once
+    return schedule
+
+#for overloaded days: gives up after the time limit and returns (schedule,unplaced), with the
+#schedule holding as many of the tasks as it managed to fit
+def constructBestSchedule(log,granularity=60,ordering="mostConstrained",timeLimit=0.5,nodeLimit=None,portfolio=None,
+    cache=None,answers=(),optimize=False,dayStart=0,dayEnd=minutesPerDay):
+    midnight,schedule,itemsWithoutTimes,fixed,tasks=problem=getScheduleProblem(log)
+    starts=solveProblem(problem,granularity,ordering,timeLimit,nodeLimit,portfolio,cache,answers,optimize,dayStart,dayEnd)
+    unplaced=recordStep(log.history,assignStarts,midnight,schedule,itemsWithoutTimes,starts)
+    return (schedule,unplaced)
+
+def solveProblem(problem,granularity=60,ordering="mostConstrained",timeLimit=None,nodeLimit=None,portfolio=None,
+    cache=None,answers=(),optimize=False,dayStart=0,dayEnd=minutesPerDay): #{index into itemsWithoutTimes:start} for as many items as fit
+    if cache!=None:
+        fingerprint=getFingerprint(problem,answers,granularity,ordering,optimize,dayStart,dayEnd)
+        starts=cache.get(fingerprint)
+        if starts!=None: return starts
+    midnight,schedule,itemsWithoutTimes,fixed,tasks=problem
+    if portfolio!=None:
+        deadline=None if timeLimit==None else time.monotonic()+timeLimit
+        starts=portfolio.solveBest(fixed,tasks,granularity,timeLimit,nodeLimit,dayStart,dayEnd)
+        finished=len(starts)==len(tasks)
+        if optimize: #improve on whatever the portfolio found, in whatever's left of the time limit
+            if deadline!=None: timeLimit=max(0,deadline-time.monotonic())
+            solver=getSolver(problem,granularity,ordering,timeLimit,nodeLimit,optimize,dayStart,dayEnd)
+            starts=solver.solveBest(starts)
+            finished=finished and not solver.outOfBudget
+    else:
+        solver=getSolver(problem,granularity,ordering,timeLimit,nodeLimit,optimize,dayStart,dayEnd)
+        starts=solver.solveBest()
+        finished=not solver.outOfBudget
+    #a search that ran out of time might do better given more, so only keep finished ones
+    if cache!=None and finished: cache.put(fingerprint,starts)
+    return starts
+
+def getSolver(problem,granularity=60,ordering="mostConstrained",timeLimit=None,nodeLimit=None,optimize=False,
+    dayStart=0,dayEnd=minutesPerDay):
+    midnight,schedule,itemsWithoutTimes,fixed,tasks=problem
+    if not optimize:
+        return ScheduleSolver(fixed,tasks,granularity,ordering,dayStart,dayEnd,timeLimit=timeLimit,nodeLimit=nodeLimit)
+    #the optimizer also needs to know the groups, and which tasks are priorities
+    fixedItems=[(fixed[i][0],fixed[i][1],schedule[i].group) for i in range(len(schedule))]
+    tasks=[(i,duration,itemsWithoutTimes[i].group,itemsWithoutTimes[i].priority) for (i,duration) in tasks]
+    return ScheduleOptimizer(fixedItems,tasks,granularity,dayStart,dayEnd,timeLimit=timeLimit,nodeLimit=nodeLimit)
+
+def getFingerprint(problem,answers=(),*settings):
+    #everything about a day that the plan depends on, the same for any day with the same tasks. The
+    #items to place are in canonical order (see getScheduleProblem) so cached starts line up with them.
+    midnight,schedule,itemsWithoutTimes,fixed,tasks=problem
+    dayStart=getDayStamp(midnight)
+    fixedItems=tuple(sorted(getItemFingerprint(item)+(item.startStamp-dayStart,) for item in schedule))
+    return (fixedItems,tuple(getItemFingerprint(item) for item in itemsWithoutTimes),tuple(answers))+settings
+
+def getItemFingerprint(item):
+    return (item.name,item.durationMinutes,str(item.group),bool(item.priority))
+
+def repairSchedule(daySched,log,granularity=60,timeLimit=0.5):
+    #brings a schedule Plan My Day made up to date after log's tasks were added, changed or deleted.
+    #Only the tasks that changed and the planned tasks they now overlap get new times; everything
+    #else stays where it is. Returns the tasks that were given new times.
+    if daySched.isUpToDate(log): return []
+    toPlace=[] #tasks that need a time from the solver
+    newlyTimed=[] #tasks taking up time they didn't before, which win over anything planned there
+    scheduledIds=set(task.itemId for task in daySched.schedule)
+    for task in list(daySched.schedule):
+        if task.log is not log: #deleted
+            daySched.removePeriod(task)
+        elif task.version!=daySched.periodVersions[task.itemId]:
+            start,end=daySched.periodIntervals[task.itemId]
+            if task.startStamp==start and task.endStamp==end: #nothing the schedule cares about changed
+                daySched.periodVersions[task.itemId]=task.version
+                continue
+            planned=daySched.isPlanned(task)
+            daySched.removePeriod(task)
+            if task.startStamp==None or (planned and task.startStamp==start): toPlace.append(task)
+            else: newlyTimed.append(task) #the user picked its time
+    for item in log.items.values():
+        if item.itemId not in scheduledIds:
+            if item.startStamp==None: toPlace.append(item)
+            else: newlyTimed.append(item)
+    for task in newlyTimed:
+        for conflict in daySched.busy.getConflicts(task.startStamp,task.endStamp):
+            if daySched.isPlanned(conflict):
+                daySched.removePeriod(conflict)
+                toPlace.append(conflict)
+        daySched.addPeriod(task)
+    if len(toPlace)>0: placeRepairedTasks(daySched,log,toPlace,granularity,timeLimit)
+    daySched.markUpToDate(log)
+    return [task for task in toPlace if task.startStamp!=None]
+
+def placeRepairedTasks(daySched,log,toPlace,granularity,timeLimit):
+    midnight=datetime.datetime(log.date.year,log.date.month,log.date.day)
+    dayStart=getDayStamp(log.date)
+    def solveAround(fixedTasks,tasksToPlace):
+        fixed=[(task.startStamp-dayStart,task.endStamp-dayStart) for task in fixedTasks]
+        tasks=[(i,tasksToPlace[i].durationMinutes) for i in range(len(tasksToPlace))]
+        return ScheduleSolver(fixed,tasks,granularity,dayStart=daySched.dayStart,dayEnd=daySched.dayEnd,
+            timeLimit=timeLimit).solveBest()
+    starts=solveAround(daySched.schedule,toPlace)
+    if len(starts)<len(toPlace):
+        #no room without moving something else, so see if replanning every planned task does better
+        plannedTasks=[task for task in daySched.schedule if daySched.isPlanned(task)]
+        fixedTasks=[task for task in daySched.schedule if not daySched.isPlanned(task)]
+        allStarts=solveAround(fixedTasks,plannedTasks+toPlace)
+        if len(allStarts)>len(starts)+len(plannedTasks):
+            for task in plannedTasks:
+                daySched.removePeriod(task)
+            toPlace[:0]=plannedTasks
+            starts=allStarts
+    daySched.unplaced=[]
+    for i in range(len(toPlace)):
+        if i in starts:
+            toPlace[i].assignedTime=midnight+datetime.timedelta(minutes=starts[i])
+            daySched.addPeriod(toPlace[i],planned=True)
+        else:
+            toPlace[i].assignedTime=None
+            daySched.unplaced.append(toPlace[i])
+
+#what the solver needs to know about log: the (start,end) minutes already taken and the
+#(index into itemsWithoutTimes,duration) of the items to fit around them
+def getScheduleProblem(log):
+    midnight=datetime.datetime(log.date.year,log.date.month,log.date.day)
+    dayStart=getDayStamp(log.date)
+    schedule=[]
+    fixed=[]
+    itemsWithoutTimes=[]
+    for item in log.items.values(): #add items already with an assigned time
+        if item.startStamp!=None:
+            schedule.append(item)
+            fixed.append((item.startStamp-dayStart,item.endStamp-dayStart))
+        else: itemsWithoutTimes.append(item)
+    itemsWithoutTimes.sort(key=getItemFingerprint) #so the same day always numbers its items the same way
+    tasks=[(i,itemsWithoutTimes[i].durationMinutes) for i in range(len(itemsWithoutTimes))]
+    return (midnight,schedule,itemsWithoutTimes,fixed,tasks)
+
+def assignStarts(midnight,schedule,itemsWithoutTimes,starts): #returns the items that didn't get a start
+    unplaced=[]
+    for i in range(len(itemsWithoutTimes)):
+        if i in starts:
+            itemsWithoutTimes[i].assignedTime=midnight+datetime.timedelta(minutes=starts[i])
+            schedule.append(itemsWithoutTimes[i])
+        else: unplaced.append(itemsWithoutTimes[i])
+    return unplaced
+
+def getOccupancy(log,exclude=None): #the minutes of the log's day its timed items take up
+    dayStart=getDayStamp(log.date)
+    occupancy=OccupancyMap()
+    for (start,end,item) in log.timeIndex:
+        if item is not exclude:
+            occupancy.occupy(start-dayStart,end-dayStart)
+    return occupancy
+
+def getFreeStarts(log,item,granularity=5): #the times item could start at without overlapping anything
+    midnight=datetime.datetime(log.date.year,log.date.month,log.date.day)
+    starts=getOccupancy(log,item).getStarts(item.durationMinutes,granularity)
+    return [midnight+datetime.timedelta(minutes=start) for start in starts]
+
+def getNextFreeTime(log,item,granularity=5): #the first of those at or after item's time, or None
+    midnight=datetime.datetime(log.date.year,log.date.month,log.date.day)
+    earliest=0 if item.startStamp==None else item.startStamp-getDayStamp(log.date)
+    start=getOccupancy(log,item).getFirstStart(item.durationMinutes,granularity,earliest=earliest)
+    if start==None: return None
+    return midnight+datetime.timedelta(minutes=start)
+
+def getDateTimeFromString(date,timeString):
+    colonIndex=timeString.find(":")
+    hour=int(timeString[:colonIndex])
+    minuteLen=2
+    minute=int(timeString[colonIndex+1:colonIndex+1+minuteLen])
+    return datetime.datetime(date.year,date.month,date.day,hour=hour,minute=minute)
@@ -0,0 +1,78 @@
+####################################
+# My Bullet Journal - portfolio solving
+# Races several differently set up solvers on a process pool and keeps the first that finishes.
+####################################
+
+import multiprocessing
+from .solver import ScheduleSolver,minutesPerDay
+
+__all__=["SchedulePortfolio","getVariants"]
+
+orderings=["mostConstrained","longestFirst","given"]
+gapOrderings=["earliest","tightest"]
+
+stopRun=None #in the workers: the latest run that's been told to stop
+
+def initWorker(sharedStopRun):
+    global stopRun
+    stopRun=sharedStopRun
+
+def getVariants(granularity,granularities=()):
+    #every ordering with every gap ordering, on the asked for grid and on any coarser grids given
+    #(which only make sense if they're multiples of it, so their starts are on the asked for grid too)
+    variants=[]
+    for variantGranularity in [granularity]+[other for other in granularities if other%granularity==0]:
+        for ordering in orderings:
+            for gapOrdering in gapOrderings:
+                variants.append((variantGranularity,ordering,gapOrdering))
+    return variants
+
+def solveVariant(spec): #runs in the workers: returns (starts,placedEverything,gaveUp,granularity)
+    runId,fixed,tasks,(granularity,ordering,gapOrdering),timeLimit,nodeLimit,dayStart,dayEnd=spec
+    solver=ScheduleSolver(fixed,tasks,granularity,ordering,dayStart,dayEnd,timeLimit=timeLimit,nodeLimit=nodeLimit,
+        gapOrdering=gapOrdering,shouldStop=lambda:stopRun.value>=runId)
+    starts=solver.solveBest()
+    return (starts,len(starts)==len(tasks),solver.outOfBudget,granularity)
+
+class SchedulePortfolio(object):
+    #how long a search takes depends a lot on the order it tries things in, so this runs a variant
+    #for each order at once and stops the rest as soon as one places every task (or one proves it
+    #can't be done). The pool is started the first time it's needed and kept for later days.
+    def __init__(self,numWorkers=None,granularities=()):
+        self.numWorkers=numWorkers
+        self.granularities=granularities #coarser grids to also try
+        self.pool=None
+        self.stopRun=None
+        self.runId=0
+
+    def getPool(self):
+        if self.pool==None:
+            self.stopRun=multiprocessing.RawValue("i",0)
+            self.pool=multiprocessing.Pool(self.numWorkers,initWorker,(self.stopRun,))
+        return self.pool
+
+    def solve(self,fixed,tasks,granularity=60,timeLimit=None,nodeLimit=None,dayStart=0,dayEnd=minutesPerDay): #like ScheduleSolver.solve
+        starts=self.solveBest(fixed,tasks,granularity,timeLimit,nodeLimit,dayStart,dayEnd)
+        return starts if len(starts)==len(tasks) else None
+
+    def solveBest(self,fixed,tasks,granularity=60,timeLimit=None,nodeLimit=None,dayStart=0,dayEnd=minutesPerDay): #like ScheduleSolver.solveBest
+        if len(tasks)==0: return {}
+        pool=self.getPool()
+        self.runId+=1
+        runId=self.runId
+        specs=[(runId,fixed,tasks,variant,timeLimit,nodeLimit,dayStart,dayEnd) for variant in getVariants(granularity,self.granularities)]
+        bestStarts=None
+        #let every variant report back, even the stopped ones, so none are still running next time
+        for (starts,placedEverything,gaveUp,variantGranularity) in pool.imap_unordered(solveVariant,specs):
+            if placedEverything or (not gaveUp and variantGranularity==granularity): self.cancel(runId)
+            if bestStarts==None or len(starts)>len(bestStarts): bestStarts=starts
+        return bestStarts
+
+    def cancel(self,runId=None): #stops the current run; safe to call from another thread
+        if self.stopRun!=None: self.stopRun.value=max(self.stopRun.value,runId or self.runId)
+
+    def close(self):
+        if self.pool!=None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool=None
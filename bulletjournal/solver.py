@@ -0,0 +1,184 @@
+####################################
+# My Bullet Journal - schedule solver
+# Fits tasks into the free time of a day by backtracking. Times are minutes since midnight.
+####################################
+
+import time
+from .intervals import IntervalIndex
+
+__all__=["ScheduleSolver","minutesPerDay"]
+
+minutesPerDay=24*60
+
+class ScheduleSolver(object):
+    #fixed is a list of (start,end) times that are already taken, and tasks is a list of (key,duration)
+    #to fit around them. Tasks may only start on multiples of granularity minutes.
+    #
+    #Instead of trying every start time, the solver decides which gap between fixed times each task
+    #goes in. Tasks in a gap are packed back to back from its first slot, so a gap can take a set of
+    #tasks as long as their durations, each rounded up to the grid except the last one, fit in it.
+    #Any schedule that works can be packed like that, so no solutions are lost.
+    #
+    #ordering decides which task gets placed next:
+    #  "mostConstrained" - the task that fits in the fewest gaps, longest first on ties
+    #  "longestFirst" - longest duration first
+    #  "given" - the order tasks were given in
+    #and gapOrdering decides which gaps it tries first:
+    #  "earliest" - in time order, so the day fills up from the morning
+    #  "tightest" - the ones with the least room left first
+    #
+    #timeLimit (seconds) and nodeLimit cap how long the search runs. Once either runs out, another
+    #thread calls cancel, or shouldStop() returns True, the search gives up, and solveBest still has
+    #the best partial schedule it saw.
+    def __init__(self,fixed,tasks,granularity=60,ordering="mostConstrained",dayStart=0,dayEnd=minutesPerDay,
+        timeLimit=None,nodeLimit=None,gapOrdering="earliest",shouldStop=None):
+        self.tasks=list(tasks)
+        self.granularity=granularity
+        self.ordering=ordering
+        self.gapOrdering=gapOrdering
+        self.dayStart=dayStart
+        busy=IntervalIndex()
+        for (start,end) in fixed:
+            busy.add(max(start,dayStart),min(end,dayEnd))
+        self.gaps=busy.getGaps(dayStart,dayEnd)
+        self.gapStarts=[self.getFirstSlot(gapStart) for (gapStart,gapEnd) in self.gaps]
+        self.capacities=[max(0,self.gaps[gap][1]-self.gapStarts[gap]) for gap in range(len(self.gaps))]
+        self.gapSlots=[self.getSlotsNeeded(capacity) for capacity in self.capacities]
+        self.usedTime=[0]*len(self.gaps) #rounded durations of the tasks in each gap
+        self.maxWaste=[0]*len(self.gaps) #the most rounding any task in the gap had
+        self.gapTasks=[[] for gap in self.gaps]
+        self.freeTime=sum(self.capacities)
+        self.failedStates=set() #states already shown to have no solution
+        self.numNodes=0
+        self.timeLimit=timeLimit
+        self.nodeLimit=nodeLimit
+        self.deadline=None
+        self.outOfBudget=False
+        self.cancelled=False
+        self.shouldStop=shouldStop
+        self.bestGapTasks=None #the gap contents with the most tasks placed so far
+        self.bestNumPlaced=-1
+        self.taskOrder=list(range(len(self.tasks)))
+        if ordering=="longestFirst":
+            self.taskOrder.sort(key=lambda task:-self.tasks[task][1])
+
+    def solve(self): #returns {key:start} with every task placed, or None if they can't all fit
+        if self.timeLimit!=None: self.deadline=time.monotonic()+self.timeLimit
+        if self.search(set(self.taskOrder)): return self.getStarts(self.gapTasks)
+        return None
+
+    def solveBest(self): #returns {key:start} for as many tasks as could be placed within the budget
+        starts=self.solve()
+        if starts!=None: return starts
+        #the search only records the partial schedules it got to, and the bounds cut most of those
+        #off early, so also try packing the shortest tasks first
+        greedyGapTasks=self.placeGreedily()
+        if sum(len(tasks) for tasks in greedyGapTasks)>self.bestNumPlaced: return self.getStarts(greedyGapTasks)
+        return self.getStarts(self.bestGapTasks)
+
+    def search(self,remaining):
+        self.numNodes+=1
+        if len(self.tasks)-len(remaining)>self.bestNumPlaced:
+            self.bestNumPlaced=len(self.tasks)-len(remaining)
+            self.bestGapTasks=[list(tasks) for tasks in self.gapTasks]
+        if len(remaining)==0: return True
+        if self.isOutOfBudget(): return False
+        #tasks with the same duration are interchangeable, so all that matters is how full each
+        #gap is and the durations still left to place
+        state=(tuple(self.usedTime),tuple(self.maxWaste),tuple(sorted(self.tasks[task][1] for task in remaining)))
+        if state in self.failedStates: return False
+        task,gaps=self.chooseTask(remaining)
+        if task!=None:
+            remaining.remove(task)
+            for gap in gaps:
+                self.assign(task,gap)
+                if self.search(remaining): return True
+                self.unassign(task,gap)
+            remaining.add(task)
+        if not self.outOfBudget: self.failedStates.add(state)
+        return False
+
+    def cancel(self):
+        self.cancelled=True
+
+    def isOutOfBudget(self):
+        if (self.cancelled or (self.nodeLimit!=None and self.numNodes>self.nodeLimit)
+            or (self.deadline!=None and time.monotonic()>self.deadline)
+            or (self.shouldStop!=None and self.numNodes%64==0 and self.shouldStop())):
+            self.outOfBudget=True
+        return self.outOfBudget
+
+    def placeGreedily(self): #puts each task, shortest first, in the first gap it fits in
+        placed=[]
+        for task in sorted(self.taskOrder,key=lambda task:self.tasks[task][1]):
+            for gap in range(len(self.gaps)):
+                if self.fits(gap,self.tasks[task][1]):
+                    self.assign(task,gap)
+                    placed.append((task,gap))
+                    break
+        gapTasks=[list(tasks) for tasks in self.gapTasks]
+        for (task,gap) in reversed(placed):
+            self.unassign(task,gap)
+        return gapTasks
+
+    def chooseTask(self,remaining): #returns (None,None) if the remaining tasks can't possibly fit
+        durations=sorted((self.tasks[task][1] for task in remaining),reverse=True)
+        if sum(durations)>self.freeTime: return (None,None)
+        #a tighter version of the same bound: a task touches ceil(duration/granularity) slots of the
+        #grid, no two tasks can touch the same slot, and the tasks at least as long as any given
+        #duration only fit in the gaps that still have room for that duration
+        fittingGaps={}
+        slotsNeeded=0
+        for i in range(len(durations)):
+            slotsNeeded+=self.getSlotsNeeded(durations[i])
+            if i+1<len(durations) and durations[i+1]==durations[i]: continue
+            fittingGaps[durations[i]]=[gap for gap in range(len(self.gaps)) if self.fits(gap,durations[i])]
+            freeSlots=sum(self.gapSlots[gap]-self.usedTime[gap]//self.granularity for gap in fittingGaps[durations[i]])
+            if slotsNeeded>freeSlots: return (None,None)
+        if self.ordering=="mostConstrained":
+            bestTask=min(remaining,key=lambda task:(len(fittingGaps[self.tasks[task][1]]),-self.tasks[task][1]))
+        else:
+            for task in self.taskOrder:
+                if task in remaining:
+                    bestTask=task
+                    break
+        gaps=fittingGaps[self.tasks[bestTask][1]]
+        if self.gapOrdering=="tightest":
+            gaps=sorted(gaps,key=lambda gap:self.capacities[gap]-self.usedTime[gap])
+        return (bestTask,gaps) if len(gaps)>0 else (None,None)
+
+    def fits(self,gap,duration):
+        rounded=self.getSlotsNeeded(duration)*self.granularity
+        waste=max(self.maxWaste[gap],rounded-duration) #the task with the most rounding goes last
+        return self.usedTime[gap]+rounded-waste<=self.capacities[gap]
+
+    def assign(self,task,gap):
+        duration=self.tasks[task][1]
+        self.gapTasks[gap].append((task,self.maxWaste[gap]))
+        self.usedTime[gap]+=self.getSlotsNeeded(duration)*self.granularity
+        self.maxWaste[gap]=max(self.maxWaste[gap],self.getSlotsNeeded(duration)*self.granularity-duration)
+        self.freeTime-=duration
+
+    def unassign(self,task,gap):
+        task,self.maxWaste[gap]=self.gapTasks[gap].pop()
+        duration=self.tasks[task][1]
+        self.usedTime[gap]-=self.getSlotsNeeded(duration)*self.granularity
+        self.freeTime+=duration
+
+    def getStarts(self,gapTasks): #packs each gap's tasks from its first slot, with the most rounded task last
+        starts={}
+        for gap in range(len(self.gaps)):
+            tasks=[task for (task,previousWaste) in gapTasks[gap]]
+            tasks.sort(key=lambda task:self.getSlotsNeeded(self.tasks[task][1])*self.granularity-self.tasks[task][1])
+            time=self.gapStarts[gap]
+            for task in tasks:
+                starts[self.tasks[task][0]]=time
+                time+=self.getSlotsNeeded(self.tasks[task][1])*self.granularity
+        return starts
+
+    def getFirstSlot(self,time): #the first start time at or after time that's on the grid
+        slots=-(-(time-self.dayStart)//self.granularity)
+        return self.dayStart+slots*self.granularity
+
+    def getSlotsNeeded(self,duration):
+        return -(-duration//self.granularity)
@@ -0,0 +1,82 @@
+####################################
+# My Bullet Journal - journal store
+# Keeps the journal in an SQLite database and only loads the days that get looked at.
+####################################
+
+import sqlite3,datetime,collections
+from .model import Task,DayLog
+from .history import History
+
+__all__=["JournalStore"]
+
+timeFormat="%Y-%m-%d %H:%M:%S.%f"
+
+class JournalStore(object):
+    #same getLog as Journal, but days are read from disk the first time they're asked for,
+    #and only the maxLoadedDays most recently used days are kept in memory
+    def __init__(self,path,maxLoadedDays=31):
+        self.connection=sqlite3.connect(path)
+        self.connection.execute("""create table if not exists tasks(date text,position integer,name text,
+            durationHour text,durationMinute text,assignedTime text,taskGroup text,marking text,
+            priority integer,timeCreated text)""")
+        self.connection.execute("create index if not exists tasksByDate on tasks(date)")
+        self.maxLoadedDays=maxLoadedDays
+        self.loadedLogs=collections.OrderedDict() #date -> DayLog, least recently used first
+        self.savedVersions={} #date -> the log's version when it was last saved
+        self.keptDates=set() #dates that are never unloaded
+        self.history=History() #undo and redo across every log, for as long as the log is loaded
+
+    def getLog(self,date):
+        if date in self.loadedLogs:
+            self.loadedLogs.move_to_end(date)
+            return self.loadedLogs[date]
+        log=self.loadLog(date)
+        log.history=self.history #only after loading, so reading the day in can't be undone
+        self.loadedLogs[date]=log
+        self.savedVersions[date]=log.version
+        self.unloadOldLogs()
+        return log
+
+    def keepLoaded(self,date): #for logs the caller holds on to, like today's
+        self.keptDates.add(date)
+
+    def unloadOldLogs(self):
+        for date in list(self.loadedLogs):
+            if len(self.loadedLogs)<=self.maxLoadedDays: break
+            if date not in self.keptDates:
+                log=self.loadedLogs.pop(date)
+                self.saveLog(log)
+                del self.savedVersions[date]
+                self.history.forgetLog(log)
+
+    def loadLog(self,date):
+        log=DayLog(date)
+        rows=self.connection.execute("""select name,durationHour,durationMinute,assignedTime,taskGroup,
+            marking,priority,timeCreated from tasks where date=? order by position""",(str(date),))
+        for (name,durationHour,durationMinute,assignedTime,group,marking,priority,timeCreated) in rows:
+            if assignedTime!=None: assignedTime=datetime.datetime.strptime(assignedTime,timeFormat)
+            task=Task(name,durationHour,durationMinute,assignedTime,group,marking,priority==1)
+            task.timeCreated=datetime.datetime.strptime(timeCreated,timeFormat)
+            log.addItem(task)
+        return log
+
+    def saveLog(self,log):
+        if self.savedVersions.get(log.date)==log.version: return #nothing changed since it was loaded or saved
+        rows=[]
+        for (key,item) in log.sortedIndexes["timeCreated"]:
+            if not isinstance(item,Task): continue
+            assignedTime=None if item.assignedTime==None else item.assignedTime.strftime(timeFormat)
+            rows.append((str(log.date),len(rows),item.name,str(item.durationMinutes//60),str(item.durationMinutes%60),assignedTime,
+                item.group,item.marking,1 if item.priority else 0,item.timeCreated.strftime(timeFormat)))
+        with self.connection:
+            self.connection.execute("delete from tasks where date=?",(str(log.date),))
+            self.connection.executemany("insert into tasks values (?,?,?,?,?,?,?,?,?,?)",rows)
+        self.savedVersions[log.date]=log.version
+
+    def save(self): #writes every loaded log that changed
+        for log in self.loadedLogs.values():
+            self.saveLog(log)
+
+    def close(self):
+        self.save()
+        self.connection.close()
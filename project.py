@@ -6,297 +6,9 @@
 ####################################
 
 from tkinter import *
-import datetime,time,copy,string,math
-
-####################################
-# OOP classes
-####################################
-
-class Item(object):
-
-    def __init__(self,name,assignedTime=None,group=None,marking="incomplete"):
-        self.name=name
-        self.group=group
-        self.selected=False
-        self.row=0
-        self.duration=datetime.timedelta(hours=int(self.durationHour),minutes=int(self.durationMinute))
-        self.selectedHour=1
-        self.selectedMinute=0
-        self.selectedAMPM="AM"
-        self.assignedTime=assignedTime
-        self.shifted=False
-        self.timeCreated=datetime.datetime.today()
-        self.marking=marking
-        self.isEditing=True
-
-    def __hash__(self):
-        return hash((self.timeCreated,self.name))
-
-    def __eq__(self,other):
-        if not isinstance(other,Item): return False
-        return self.name==other.name and self.duration==other.duration
-
-    def getColor(self,data):
-        groupDict=DayLog.groupDict
-        return groupDict[self.group] if self.group!=None else data.backgroundColor
-
-    def makeShifted(self):
-        if not self.shifted:
-            self.shifted=True
-            self.row+=1
-
-    def getHourMinute(self):
-        if self.assignedTime==None: return ":"
-        hour=self.assignedTime.hour
-        if hour<12:
-            hourStr=str(hour) if hour!=0 else "12"
-            ampmStr="AM"
-        else:
-            hourStr=str(int(hour)-12) if hour!=12 else str(int(hour))
-            ampmStr="PM"
-        minute=self.assignedTime.minute
-        minuteStr=str(minute)
-        if len(minuteStr)==1: minuteStr="0"+minuteStr
-        return hourStr+":"+minuteStr,ampmStr
-
-    def getDurationString(self):
-        duration=str(self.duration)
-        colonIndex1=duration.find(":")
-        hours=duration[:colonIndex1]
-        duration=duration[colonIndex1+1:]
-        colonIndex2=duration.find(":")
-        minutes=duration[:colonIndex2]
-        if minutes.startswith("0"): minutes=minutes[1:]
-        return (hours+" hours and "+minutes+" minutes")
-
-    def toggleGroup(self):
-        groupList=sorted(list(DayLog.groupDict))+[None]
-        nextIndex=groupList.index(self.group)+1
-        if nextIndex==len(groupList): nextIndex=0
-        self.group=groupList[nextIndex]
-
-    def togglePriority(self):
-        self.priority=not self.priority
-
-class Task(Item):
-    def __init__(self,name,durationHour="0",durationMinute="0",assignedTime=None,group=None,marking="incomplete",priority=False):
-        self.durationHour=durationHour
-        self.durationMinute=durationMinute
-        super().__init__(name,assignedTime,group,marking)
-        self.priority=priority
-
-    def __repr__(self):
-        return "Task %s" % (self.name)
-
-class DayLog(object):
-    groupDict={"school":"khaki","extracurricular":"mediumpurple","health":"lightcyan","personal":"palegreen"}
-    invertedMarkingDict={0:"incomplete",1:"started",2:"migrated",3:"completed",4:"cancelled"}
-
-    def __init__(self,date,data):
-        self.date=date
-        self.itemSet=set()
-
-    def __repr__(self):
-        return "DayLog %s" % self.date
-
-    def addItem(self,*args):
-        for item in args:
-            if isinstance(item,Item):
-                self.itemSet.add(item)
-
-    def deleteItem(self,item):
-        if item in self.itemSet:
-            self.itemSet.remove(item)
-
-    def unshiftAll(self):
-        for item in self.itemSet:
-            if item.shifted:
-                item.shifted=False
-                item.row-=1
-
-    def getSortedList(self,sortMode):
-        if sortMode=="group" or sortMode=="priority" or sortMode=="marking":
-            #sort by grouping all of the items with the same attribute together
-            if sortMode=="group": itemList=self.sortByGroup(list(self.itemSet))
-            elif sortMode=="priority": itemList=self.sortByPriority(list(self.itemSet))
-            elif sortMode=="marking": itemList=self.sortByMarking(list(self.itemSet))
-        else:
-            #sort by binary search
-            itemList=[]
-            for item in self.itemSet:
-                if len(itemList)==0: itemList.append(item)
-                else:
-                    if sortMode=="name": index=self.findIndexByName(item,itemList)
-                    elif sortMode=="assignedTime": index=self.findIndexByAssignedTime(item,itemList)
-                    elif sortMode=="timeCreated": index=self.findIndexByTimeCreated(item,itemList)
-                    itemList=itemList[:index]+[item]+itemList[index:]
-        #adjust the "row" attribute for each item
-        i=0
-        while i<len(itemList):
-            itemList[i].row=i
-            i+=1
-            if self.getSelectedTask()!=None and self.getSelectedTask()==itemList[i-1]: break #to handle row shifting
-        for j in range(i+1,len(itemList)):
-            itemList[i].row=i+1
-        return itemList
-
-    @staticmethod
-    def findIndexByName(item,itemList): #recursive
-        def findNearItem(item,itemList,index=0):
-            if len(itemList)==1: return itemList[0]
-            else:
-                mid=len(itemList)//2
-                if item.name>itemList[mid].name:
-                    newIndex=index+mid
-                    return findNearItem(item,itemList[mid:],newIndex)
-                elif item.name==itemList[mid].name: return itemList[mid]
-                else:
-                    newIndex=index+mid if index==0 else index-mid
-                    return findNearItem(item,itemList[:mid],newIndex)
-        nearIndex=itemList.index(findNearItem(item,itemList))
-        if item.name<itemList[nearIndex].name: return nearIndex
-        else: return nearIndex+1
-
-    @staticmethod
-    def findIndexByTimeCreated(item,itemList): #recursive
-        def findNearItem(item,itemList,index=0):
-            if len(itemList)==1: return itemList[0]
-            else:
-                mid=len(itemList)//2
-                if item.timeCreated>itemList[mid].timeCreated:
-                    newIndex=index+mid
-                    return findNearItem(item,itemList[mid:],newIndex)
-                elif item.timeCreated==itemList[mid].timeCreated: return itemList[mid]
-                else:
-                    newIndex=index+mid if index==0 else index-mid
-                    return findNearItem(item,itemList[:mid],newIndex)
-        nearIndex=itemList.index(findNearItem(item,itemList))
-        if item.timeCreated<itemList[nearIndex].timeCreated: return nearIndex
-        else: return nearIndex+1
-
-    @staticmethod
-    def findIndexByAssignedTime(item,itemList): #recursive
-        def findNearItem(item,itemList,index=0):
-            if len(itemList)==1: return itemList[0]
-            else:
-                mid=len(itemList)//2
-                if (itemList[mid].assignedTime==None or item.assignedTime>itemList[mid].assignedTime):
-                    newIndex=index+mid
-                    return findNearItem(item,itemList[mid:],newIndex)
-                elif item.assignedTime==itemList[mid].assignedTime: return itemList[mid]
-                else:
-                    newIndex=index+mid if index==0 else index-mid
-                    return findNearItem(item,itemList[:mid],newIndex)
-        if item.assignedTime==None: return len(itemList)
-        else:
-            nearIndex=itemList.index(findNearItem(item,itemList))
-            if (itemList[nearIndex].assignedTime!=None
-                and item.assignedTime<itemList[nearIndex].assignedTime):
-                return nearIndex
-            else: return nearIndex+1
-
-    @staticmethod
-    def sortByGroup(itemList):
-        result=[]
-        groupList=sorted(list(DayLog.groupDict))+[None]
-        for group in groupList:
-            for item in itemList:
-                if item.group==group:
-                    result.append(item)
-        return result
-
-    @staticmethod
-    def sortByPriority(itemList):
-        result=[]
-        for item in itemList:
-            if item.priority: result.insert(0,item)
-            else: result.append(item)
-        return result
-
-    @staticmethod
-    def sortByMarking(itemList):
-        result=[]
-        markingList=[]
-        for index in range(len(DayLog.invertedMarkingDict)):
-            markingList.append(DayLog.invertedMarkingDict[index])
-        for marking in markingList:
-            for item in itemList:
-                if item.marking==marking:
-                    result.append(item)
-        return result
-
-    def getSelectedTask(self):
-        for item in self.itemSet:
-            if item.selected:
-                return item
-
-    def deselectAll(self):
-        for item in self.itemSet: #if another item is already selected, deselect it
-            if item.selected:
-                item.selected=False
-                self.unshiftAll()
-
-    def getEditingTask(self):
-        for item in self.itemSet:
-            if item.isEditing: return item
-        else: return None
-
-    def stopEditingTask(self):
-        for item in self.itemSet:
-            if item.isEditing:
-                item.isEditing=False
-                continue
-
-    def replaceTask(self,data,currTask,previousTaskState):
-        itemList=self.getSortedList(data.sortMode)
-        for index in range(len(itemList)):
-            if itemList[index] is currTask:
-                data.previousTaskState.selected=False
-                data.previousTaskState.isEditing=False
-                self.itemSet.remove(itemList[index])
-                self.itemSet.add(previousTaskState)
-
-class DaySchedule(object):
-    def __init__(self):
-        self.startTime=datetime.time(hour=0,minute=0)
-        self.endTime=datetime.time(hour=23,minute=59)
-        self.dayLength=datetime.timedelta(hours=24)
-        self.date=datetime.datetime.today()
-        self.questions=[]
-        self.schedule=[]
-        self.sleepTime=None
-
-    def addQuestion(self,*questions):
-        for question in questions:
-            self.questions.append(question)
-
-    def addPeriod(self,task):
-        self.schedule.append(task)
-
-    def isEmpty(self):
-        if self.schedule==None or len(self.schedule)==0: return True
-        else: return False
-
-class Question(object):
-    def __init__(self,question=""):
-        self.question=question
-        self.possibleAnswers=[] #answer choices for the user
-        self.answer=None #actual answer the user gave
-
-    def __repr__(self):
-        return self.question
-
-    def addAnswer(self,answer):
-        self.answer=answer
-
-    def addPossibleAnswer(self,*possibleAnswers):
-        for possibleAnswer in possibleAnswers:
-            self.possibleAnswers.append(possibleAnswer)
-
-class StudyQuestion(Question):
-    def __init__(self,question,item):
-        super().__init__(question)
-        self.test=item
+import tkinter.font
+from bulletjournal import *
+import datetime,time,string,math,os,collections
 
 ####################################
 # Model/Controller Functions
@@ -308,9 +20,7 @@ def init(data):
     data.x,data.y=0,0
     data.timesFired=0
     data.minPerHour=60
-    data.day=datetime.datetime.today().day
-    data.month=datetime.datetime.today().month
-    data.year=datetime.datetime.today().year
+    data.controlMask=0x0004 #the bit of a key event's state that's set while Control is held
 
     colors(data)
     openingScreenValues(data)
@@ -320,25 +30,10 @@ def init(data):
     editTaskScreenValues(data)
     planMyDayValues(data)
     helpScreens(data)
+    layoutValues(data)
 
-def loadImages(data):
-    data.dailyLogImage=PhotoImage(file="images\dailylogbutton.gif")
-    data.planMyDayImage=PhotoImage(file="images\planmydaybutton.gif")
-    data.enterUsernameImage=PhotoImage(file="images\enterUsernameText.gif")
-    data.submitButtonImage=PhotoImage(file="images\submitbutton.gif")
-    data.helpButtonImage=PhotoImage(file="images\helpbutton.gif")
-    data.menuButtonImage=PhotoImage(file="images\menubutton.gif")
-    data.smallSubmitButtonImage=PhotoImage(file="images\smallsubmitbutton.gif")
-    data.smallPlanMyDayImage=PhotoImage(file="images\smallplanmydaybutton.gif")
-    data.smallDailyLogImage=PhotoImage(file="images\smalldailylogbutton.gif")
-    data.smallBlankButton=PhotoImage(file="images\smallblankbutton.gif")
-    data.helpScreen1=PhotoImage(file="images\help1.gif")
-    data.helpScreen2=PhotoImage(file="images\help2.gif")
-    data.helpScreen3=PhotoImage(file="images\help3.gif")
-    data.helpScreen4=PhotoImage(file="images\help4.gif")
-    data.helpScreen5=PhotoImage(file="images\help5.gif")
-    data.helpScreen6=PhotoImage(file="images\help6.gif")
-    data.scheduleErrorScreen=PhotoImage(file="images\scheduleError.gif")
+def loadImages(data): #images are only read from disk the first time they're drawn
+    data.assets=AssetManager(os.path.join(os.path.dirname(os.path.abspath(__file__)),"images"))
 
 def colors(data):
     data.backgroundColor="Lavender"
@@ -363,6 +58,7 @@ def windowValues(data):
     data.exitButtonDim=data.outerMarginY/9
     data.exitButtonMargin=2
 
+def windowLayout(data):
     data.errorexitx0=data.width-data.errorMarginX-data.exitButtonDim-data.exitButtonMargin
     data.errorexitx1=data.errorexitx0+data.exitButtonDim
     data.errorexity0=data.errorMarginY+data.exitButtonMargin
@@ -381,38 +77,67 @@ def windowValues(data):
     data.continuex0,data.continuey0=data.width*11/32,data.height*59/64
     data.continuex1,data.continuey1=data.width*23/32,data.height*126/128
 
+    data.cancelx0,data.cancely0=data.width*2/5,data.height*43/64
+    data.cancelx1,data.cancely1=data.width*3/5,data.height*45/64
+
 def dailyLogValues(data):
     data.isDailyLog=False
+    data.journalPath=os.path.join(os.path.dirname(os.path.abspath(__file__)),"journal.db")
     data.taskMargin=50
     data.bulletDim=20
     data.arrowSize=15
-    data.sortDropDownM=data.width/10
     data.sortDropDownHeight=25
     data.showSortByDropdown=False
     data.taskDropDownM=3
     data.plusButtonDiameter=40
-    data.sortbyx0,data.sortbyy0=data.width/3+data.sortDropDownM,data.height/5
-    data.sortbyx1,data.sortbyy1=data.width*2/3,data.sortbyy0+data.sortDropDownHeight
-
-    data.editx0,data.editx1=data.width*3/8,data.width*15/32
-    data.deletex0,data.deletex1=data.width*15/32,data.width*9/16
-
+    data.itemListFont="Cambria 12"
+    data.fonts={} #font description -> tkinter.font.Font, for measuring text
+    data.textWidths=collections.OrderedDict() #(text,font) -> width in pixels, least recently used first
+    data.maxTextWidths=1000 #typing measures a new string every key, so only keep the recent ones
+    data.itemHitIndex=None #RowHitIndex of the tasks in the daily log as last laid out
+    data.itemHitList=None #the item list itemHitIndex was built from
+    data.itemHitView=None #and the window size, scroll position and selected item
+    data.listScroll=0 #the row at the top of the task box
     data.currTask=None
     data.anyTaskSelected=False
-    data.todayLog=DayLog(datetime.date.today(),data)
+    data.journal=JournalStore(data.journalPath)
+    data.todayLog=data.journal.getLog(datetime.date.today())
     data.currLog=data.todayLog
-    data.logList=[data.todayLog]
+    data.journal.keepLoaded(data.todayLog.date)
     data.sortMode="timeCreated"
     data.markingDict={"incomplete":1,"started":2,"migrated":3,"completed":4,"cancelled":5}
-    data.invertedMarkingDict={0:"incomplete",1:"started",2:"migrated",3:"completed",4:"cancelled"}
+    data.invertedMarkingDict=DayLog.invertedMarkingDict
     data.sortModeDict={"name":1,"assignedTime":2,"timeCreated":3,"group":4,"priority":5,"marking":6}
 
+def dailyLogLayout(data):
+    data.sortDropDownM=data.width/10
+    data.sortbyx0,data.sortbyy0=data.width/3+data.sortDropDownM,data.height/5
+    data.sortbyx1,data.sortbyy1=data.width*2/3,data.sortbyy0+data.sortDropDownHeight
+
+    data.editx0,data.editx1=data.width*3/8,data.width*15/32
+    data.deletex0,data.deletex1=data.width*15/32,data.width*9/16
+
 def editTaskScreenValues(data):
+    data.checkmarkDim=data.outerMarginY/15
+    data.checkOffset=data.bulletDim/2-data.checkmarkDim/2
+    data.timeMarginX=50
+    data.timeMarginY=210
+
+    data.isEditScreen=False
+    data.editor=None #TaskEditor for the task in the edit screen
+    data.createNameErrorMessage=False
+    data.selectTimeScreen=False
+    data.timeConflicts=[] #tasks the time being picked overlaps
+    data.nextFreeTime=None #the first time after it that the task would fit
+    data.inHourField=False
+    data.inMinuteField=False
+    data.createDurationErrorMessage=False
+    data.isUpdatingName=False
+
+def editTaskScreenLayout(data):
     data.nameFieldx0,data.nameFieldy0=data.outerMarginX*10/8,data.outerMarginY*22/16
     data.nameFieldx1,data.nameFieldy1=data.width-data.nameFieldx0,data.nameFieldy0*9/8
     data.priorityX,data.priorityY=data.nameFieldx0*9/8,data.nameFieldy1*21/16
-    data.checkmarkDim=data.outerMarginY/15
-    data.checkOffset=data.bulletDim/2-data.checkmarkDim/2
     data.checkx0,data.checky0=data.priorityX+data.outerMarginX+data.checkOffset,data.priorityY+data.checkOffset
     data.checkx1,data.checky1=data.checkx0+data.checkmarkDim,data.checky0+data.checkmarkDim
     data.timeFieldx0,data.timeFieldy0=data.nameFieldx0*9/8+data.outerMarginX,data.nameFieldy1*3/2
@@ -425,30 +150,29 @@ def editTaskScreenValues(data):
 
     data.tasksubmitx0,data.tasksubmity0=data.outerMarginX*9/4,data.nameFieldy1*30/16
     data.tasksubmitx1,data.tasksubmity1=data.width-data.tasksubmitx0,data.tasksubmity0*17/16
-    data.timeMarginX=50
-    data.timeMarginY=210
     data.timesubmitx0,data.timesubmity0=data.tasksubmitx0,data.timeMarginY*32/16
     data.timesubmitx1,data.timesubmity1=data.tasksubmitx1,data.timesubmity0*17/16
 
-    data.isEditScreen=False
-    data.previousTaskState=None
-    data.createNameErrorMessage=False
-    data.selectTimeScreen=False
-    data.inHourField=False
-    data.inMinuteField=False
-    data.createDurationErrorMessage=False
-    data.isUpdatingName=False
-
 def planMyDayValues(data):
     data.isPlanMyDay=False
     data.isQuestionScreen=False
     data.isScheduleScreen=False
+    data.isPlanningScreen=False
+    data.planningJob=None #solves the schedule on another thread while the planning screen is up
+    data.planningTasks=[] #the tasks the answers added, starting with the sleep task
     data.currDaySched=DaySchedule()
     data.currQuestionIndex=0
     data.previousDaySched=None
-    data.testKeyWords=["exam","Exam","test","Test","quiz","Quiz","assessment","Assessment"]
     data.numHoursDaily=data.currDaySched.endTime.hour-data.currDaySched.startTime.hour+1
     data.maxAnswersPerLine=4
+    data.planGranularity=60 #minutes between the times Plan My Day can start a task at
+    data.planTimeLimit=5 #seconds Plan My Day searches for before settling for what it has
+    #repairs run in the click on the Tk thread and can search twice, so they get much less
+    data.repairTimeLimit=0.03
+    #on machines with more than one core, race a few differently ordered solvers against each other
+    data.planPortfolio=SchedulePortfolio() if (os.cpu_count() or 1)>1 else None
+    data.planCache=ScheduleCache() #plans already made, so planning the same day again is instant
+    data.planOptimize=True #put priority tasks early and keep groups together, not just fit everything in
     data.scheduleError=False
 
 def helpScreens(data):
@@ -460,17 +184,119 @@ def helpScreens(data):
     data.isHelpScreen5=False
     data.isHelpScreen6=False
 
+#layout functions:
+
+def layoutValues(data): #everything that depends on the window size; done again whenever it's resized
+    windowLayout(data)
+    dailyLogLayout(data)
+    editTaskScreenLayout(data)
+    data.layouts={} #the per-screen layouts below, made the first time each one is needed
+
+def resizeWindow(data,width,height):
+    if (width,height)!=(data.width,data.height):
+        data.width,data.height=width,height
+        layoutValues(data)
+        scrollItemList(data,0)
+        markDirty(data)
+
+def getLayout(data,layoutFunction,*args): #a screen's geometry, shared by its draw and mousePressed functions
+    key=(layoutFunction.__name__,)+args
+    if key not in data.layouts: data.layouts[key]=layoutFunction(data,*args)
+    return data.layouts[key]
+
+class Rect(object):
+    def __init__(self,x0,y0,x1,y1):
+        self.x0,self.y0,self.x1,self.y1=x0,y0,x1,y1
+
+    def contains(self,x,y):
+        return self.x0<x<self.x1 and self.y0<y<self.y1
+
+    def getCenter(self):
+        return (self.x0/2+self.x1/2,self.y0/2+self.y1/2)
+
+class Arrow(object):
+    #a triangle pointing left (direction=-1) or right (direction=1) with its tip at (x,y)
+    def __init__(self,x,y,size,direction):
+        self.x,self.y,self.size,self.direction=x,y,size,direction
+        baseX=x-direction*size
+        self.topM=(y-size-y)/(baseX-x) #top edge slope
+        self.topB=y-self.topM*x #top edge y-intercept
+        self.bottomM=(y+size-y)/(baseX-x) #bottom edge slope
+        self.bottomB=y-self.bottomM*x #bottom edge y-intercept
+        self.minX,self.maxX=min(x,baseX),max(x,baseX)
+
+    def getPoints(self):
+        baseX=self.x-self.direction*self.size
+        return (self.x,self.y,baseX,self.y-self.size,baseX,self.y+self.size)
+
+    def contains(self,x,y):
+        return (self.minX<=x<=self.maxX and
+            (x*self.topM+self.topB<=y<=self.y or self.y<=y<=x*self.bottomM+self.bottomB))
+
+class ScreenLayout(object): pass #a bag of Rects and numbers for one screen, like data
+
+def dateArrowsLayout(data):
+    layout=ScreenLayout()
+    layout.left=Arrow(data.width/8,data.height/7,data.arrowSize,-1)
+    layout.right=Arrow(data.width*7/8,data.height/7,data.arrowSize,1)
+    return layout
+
+def timeScreenLayout(data):
+    layout=ScreenLayout()
+    layout.div=div=(data.width-data.timeMarginX*9/2)/12
+    x0=data.timeMarginX*3
+    layout.hourBar=Rect(x0,data.timeMarginY*22/16,data.width-data.timeMarginX*3/2,data.timeMarginY*24/16)
+    layout.minuteBar=Rect(x0,data.timeMarginY*28/16,data.width-data.timeMarginX*3/2,data.timeMarginY*30/16)
+    layout.ampmBar=Rect(x0,data.timeMarginY*25/16,x0+div*4,data.timeMarginY*27/16)
+    #one box per hour 1-12 and per minute 0,5,...,55
+    layout.hourBoxes=[(hour,Rect(x0+div*(hour-1),layout.hourBar.y0,x0+div*hour,layout.hourBar.y1)) for hour in range(1,13)]
+    layout.minuteBoxes=[(minute,Rect(x0+div*minute/5,layout.minuteBar.y0,x0+div*(minute/5+1),layout.minuteBar.y1))
+        for minute in range(0,60,5)]
+    layout.ampmBoxes=[("AM",Rect(x0,layout.ampmBar.y0,x0+div*2,layout.ampmBar.y1)),
+        ("PM",Rect(x0+div*2,layout.ampmBar.y0,x0+div*4,layout.ampmBar.y1))]
+    layout.submit=Rect(data.timesubmitx0,data.timesubmity0,data.timesubmitx1,data.timesubmity1)
+    return layout
+
+def questionScreenLayout(data,numAnswers):
+    #a button for each answer; more than maxAnswersPerLine of them are split over two lines
+    layout=ScreenLayout()
+    splitIndex=numAnswers//2 if numAnswers>data.maxAnswersPerLine else numAnswers
+    answersPerLine=numAnswers-splitIndex if splitIndex<numAnswers else numAnswers
+    distanceBetweenRectangles=(data.width*5/8)/answersPerLine
+    left=data.width*3/16
+    margin=1/256
+    layout.answerButtons=[] #(center x,center y,clickable Rect) for each answer
+    if numAnswers>data.maxAnswersPerLine: #two lines
+        for i in range(splitIndex):
+            x=left+distanceBetweenRectangles*(i+1)
+            layout.answerButtons.append((x,data.height*19/32,Rect(x-distanceBetweenRectangles/2+margin,
+                data.height*18/32,x+distanceBetweenRectangles/2-margin,data.height*20/32)))
+        for i in range(numAnswers-splitIndex):
+            x=left+distanceBetweenRectangles*(i+1/2)
+            layout.answerButtons.append((x,data.height*22/32,Rect(x-distanceBetweenRectangles/2+margin,
+                data.height*21/32,x+distanceBetweenRectangles/2-margin,data.height*23/32)))
+    else: #one line
+        for i in range(numAnswers):
+            x=left+distanceBetweenRectangles*(i+1/2)
+            layout.answerButtons.append((x,data.height*21/32,Rect(x-distanceBetweenRectangles/2+margin,
+                data.height*20/32,x+distanceBetweenRectangles/2-margin,data.height*22/32)))
+    return layout
+
 #mousePressed functions:
 
 def mousePressed(event, data):
+    updateCurrentTask(data)
     data.x,data.y=event.x,event.y
     if data.isHelp: checkHelpScreenButtons(data)
     elif data.isOpeningScreen: checkOpeningScreenSelections(data)
     elif data.isMenu: checkMenuSelections(data)
     elif data.isDailyLog: checkDailyLogSelections(data)
     elif data.isQuestionScreen: checkQuestionScreenSelections(data)
+    elif data.isPlanningScreen: checkPlanningScreenSelections(data)
     elif data.isScheduleScreen: checkScheduleScreenSelections(data)
     elif data.scheduleError: checkScheduleErrorScreenSelections(data)
+    updateCurrentTask(data)
+    markDirty(data)
 
 def checkHelpScreenButtons(data):
     if data.continuex0<data.x<data.continuex1 and data.continuey0<data.y<data.continuey1:
@@ -521,12 +347,20 @@ def checkMenuSelections(data):
     #plan my day button
     elif (data.width*5/32<data.x<data.width*27/32 and data.height*16/32<data.y<data.height*24/32):
         data.isMenu=False
-        #a schedule hasn't been made yet
-        if data.currDaySched.isEmpty():
-            data.previousDaySched=copy.deepcopy(data.currDaySched)
-            createQuestions(data)
+        #a schedule hasn't been made yet, or what it planned has since been undone
+        if data.currDaySched.isEmpty() or scheduleStale(data.currDaySched,data.todayLog):
+            #ask the questions on a new schedule, so cancelling can just go back to this one
+            data.previousDaySched=data.currDaySched
+            data.currDaySched=DaySchedule()
+            data.currQuestionIndex=0
+            createQuestions(data.currDaySched,data.journal,data.todayLog)
             data.isQuestionScreen=True
-        else: data.isScheduleScreen=True
+        else:
+            #fit in whatever changed in today's log since the schedule was made
+            data.journal.history.startStep() #so the tasks it moves are undone together
+            repairSchedule(data.currDaySched,data.todayLog,data.planGranularity,data.repairTimeLimit)
+            data.journal.history.finishStep()
+            data.isScheduleScreen=True
     #help button
     elif (data.width*19/64<data.x<data.width*43/64 and data.height*26/32<data.y<data.height*30/32):
         data.isHelp=True
@@ -545,6 +379,7 @@ def checkDailyLogSelections(data):
             data.showSortByDropdown=False
             data.isDailyLog=False
             data.isMenu=True
+            data.journal.save()
         #today button
         elif (data.width*9/16<data.x<data.width*3/4 and data.height*7/56<data.y<data.height*9/56):
             deltaDays=datetime.datetime.today().day-data.currLog.date.day
@@ -553,6 +388,7 @@ def checkDailyLogSelections(data):
         elif distance(data.x,data.y,data.width*27/32+data.plusButtonDiameter/2,
             data.height*29/32+data.plusButtonDiameter/2)<=data.plusButtonDiameter/2:
             data.isEditScreen=True
+            data.journal.history.startStep() #finished or discarded when the edit screen is left
             data.anyTaskSelected=False
         #sort by menu
         if data.sortbyx0<data.x<data.sortbyx1 and data.sortbyy0<data.y<data.sortbyy1:
@@ -565,62 +401,75 @@ def checkDailyLogSelections(data):
         checkIfTaskSelected(data)
         if data.anyTaskSelected:
             data.currTask=data.currLog.getSelectedTask()
-            if data.currTask!=None:
+            if data.currTask!=None and isRowVisible(data,data.currTask.row):
                 data.showSortByDropdown=False
                 checkTaskMenuSelections(data,data.currTask)
         checkIfTriangleSelected(data)
+        scrollItemList(data,0) #in case tasks were deleted from the bottom of a scrolled list
 
 def checkIfTriangleSelected(data):
-    leftx0,lefty0=data.width/8,data.height/7
-    leftx1,lefty1=leftx0+data.arrowSize,lefty0-data.arrowSize
-    leftx2,lefty2=leftx0+data.arrowSize,lefty0+data.arrowSize
-    left1M=(lefty1-lefty0)/(leftx1-leftx0)#left triangle, line 1 slope
-    left1B=lefty0-left1M*leftx0 #left triangle, line 1 y-intercept
-    left2M=(lefty2-lefty0)/(leftx2-leftx0)#left triangle, line 2 slope
-    left2B=lefty0-left2M*leftx0 #left triangle, line 2 y-intercept
-    if ((leftx0<=data.x<=leftx1 and data.x*left1M+left1B<=data.y<=lefty0)
-        or (leftx0<=data.x<=leftx2 and lefty0<=data.y<=data.x*left2M+left2B)):
-        changeDate(data,-1)
-    rightx0,righty0=data.width*7/8,data.height/7
-    rightx1,righty1=rightx0-data.arrowSize,righty0-data.arrowSize
-    rightx2,righty2=rightx0-data.arrowSize,righty0+data.arrowSize
-    right1M=(righty1-righty0)/(rightx1-rightx0)#right triangle, line 1 slope
-    right1B=righty0-right1M*rightx0 #right triangle, line 1 y-intercept
-    right2M=(righty2-righty0)/(rightx2-rightx0)#right triangle, line 2 slope
-    right2B=righty0-right2M*rightx0 #right triangle, line 2 y-intercept
-    if ((rightx1<=data.x<=rightx0 and data.x*right1M+right1B<=data.y<=righty0)
-        or (rightx2<=data.x<=rightx0 and righty0<=data.y<=data.x*right2M+right2B)):
-        changeDate(data,1)
+    layout=getLayout(data,dateArrowsLayout)
+    if layout.left.contains(data.x,data.y): changeDate(data,-1)
+    if layout.right.contains(data.x,data.y): changeDate(data,1)
 
 def checkIfTaskSelected(data):
     if data.anyTaskSelected==False: data.currLog.deselectAll()
-    for i in range(len(data.itemList)):
-        currItem=data.itemList[i]
-        if not isinstance(currItem,Task): continue
-        bulletx0,bullety0=data.width/4-data.bulletDim/2,data.height/4+(currItem.row+1)*data.taskMargin-data.bulletDim/2
-        bulletx1,bullety1=bulletx0+data.bulletDim,bullety0+data.bulletDim
-        taskx0,tasky0=data.width*3/8,bullety0
-        taskx1,tasky1=taskx0+len(currItem.name)*8,bullety1
-        if ((bulletx0<data.x<bulletx1 and bullety0<data.y<bullety1) or
-            (taskx0<data.x<taskx1 and tasky0<data.y<tasky1)): #currItem was clicked on
-            if currItem.selected: #if currItem has already been selected, deselect it
-                data.anyTaskSelected=False
-                currItem.selected=False
-                data.currLog.unshiftAll()
-            else:
-                data.anyTaskSelected=True
-                data.currLog.deselectAll() #if another item is already selected, deselect it
-                currItem.selected=True
-                for index in range(i+1,len(data.itemList)): #shift all of the items below currTask down
-                    data.itemList[index].makeShifted()
+    itemList=data.currLog.getSortedList(data.sortMode)
+    clicked=getItemHitIndex(data,itemList).find(data.x,data.y)
+    if clicked==None: return
+    currItem=clicked
+    if currItem.selected: #if currItem has already been selected, deselect it
+        data.anyTaskSelected=False
+        data.currLog.deselectAll()
+    else: #selecting it deselects any other item and shifts the items below it down
+        data.anyTaskSelected=True
+        data.currLog.selectItem(currItem)
+
+def getItemHitIndex(data,itemList):
+    #the bullet and name of each task as a row band, rebuilt only when the list is laid out again
+    view=(data.width,data.height,data.listScroll,data.currLog.getSelectedTask())
+    if data.itemHitList is not itemList or data.itemHitView!=view:
+        data.itemHitIndex=RowHitIndex()
+        for i in getVisibleIndexes(data,itemList):
+            item=itemList[i]
+            if not isinstance(item,Task): continue
+            bulletx0,bullety0=data.width/4-data.bulletDim/2,getRowY(data,item.row)-data.bulletDim/2
+            taskx0=data.width*3/8
+            spans=[(bulletx0,bulletx0+data.bulletDim),(taskx0,taskx0+getTextWidth(data,item.name,data.itemListFont))]
+            data.itemHitIndex.addRow(bullety0,bullety0+data.bulletDim,spans,item)
+        data.itemHitList=itemList
+        data.itemHitView=view
+    return data.itemHitIndex
+
+def getRowY(data,row): #middle of a row in the task box, after scrolling
+    return data.height/4+(row+1-data.listScroll)*data.taskMargin
+
+def getNumVisibleRows(data): #how many whole rows fit in the task box
+    return max(1,int((data.height*7/8-data.height/4-data.bulletDim/2)//data.taskMargin))
+
+def isRowVisible(data,row):
+    return data.listScroll<=row<data.listScroll+getNumVisibleRows(data)
+
+def getVisibleIndexes(data,itemList):
+    #item i is on row i, or i+1 if it's below the selected item, so only a few indexes need checking
+    first=max(0,data.listScroll-1)
+    last=min(len(itemList),data.listScroll+getNumVisibleRows(data))
+    return [i for i in range(first,last) if isRowVisible(data,itemList[i].row)]
+
+def scrollItemList(data,numRows):
+    itemList=data.currLog.getSortedList(data.sortMode)
+    numRowsUsed=len(itemList)+(1 if data.currLog.getSelectedTask()!=None else 0) #the dropdown takes a row
+    maxScroll=max(0,numRowsUsed-getNumVisibleRows(data))
+    data.listScroll=min(max(data.listScroll+numRows,0),maxScroll)
 
 def checkTaskMenuSelections(data,task):
-    x,y=data.width/4-data.bulletDim/2,data.height/4+(task.row+1)*data.taskMargin+data.bulletDim/2+data.taskDropDownM
+    x,y=data.width/4-data.bulletDim/2,getRowY(data,task.row)+data.bulletDim/2+data.taskDropDownM
     edity0,edity1=y,y+data.bulletDim
     deletey0,deletey1=y,y+data.bulletDim
+    data.journal.history.startStep() #so marking a task migrated and migrating it are undone together
     if data.editx0<data.x<data.editx1 and edity0<data.y<edity1:
         data.isEditScreen=True
-        task.isEditing=True
+        data.currLog.startEditingTask(task)
     elif data.deletex0<data.x<data.deletex1 and deletey0<data.y<deletey1:
         data.currLog.deleteItem(task)
     #check bullet options
@@ -633,27 +482,15 @@ def checkTaskMenuSelections(data,task):
             bullety0,bullety1=y+i*0.8*data.bulletDim+data.taskDropDownM,y+(i+1)*0.8*data.bulletDim
             if bulletx0<data.x<bulletx1 and bullety0<data.y<bullety1:
                 task.marking=marking
-                task.selected=False
                 data.anyTaskSelected=False
-                data.currLog.unshiftAll()
+                data.currLog.deselectAll()
             i+=1
     checkMigration(data,task)
+    data.journal.history.finishStep()
+    if data.isEditScreen: data.journal.history.startStep() #everything done in the edit screen is undone together
 
 def checkMigration(data,task):
-    newDate=data.currLog.date+datetime.timedelta(days=1)
-    index=getDateIndex(data.logList,newDate)
-    if index==None: #tomorrow's log hasn't been made yet
-        newLog=DayLog(newDate,data)
-        addLog(data.logList,newLog)
-    else: newLog=data.logList[index]
-    if task.marking=="migrated":
-        newTask=copy.deepcopy(task)
-        newTask.marking="incomplete"
-        newLog.addItem(newTask)
-    else: #if task is not migrated, make sure it's not in tomorrow's log
-        for item in copy.deepcopy(newLog.itemSet):
-            if item.name==task.name:
-                newLog.deleteItem(item)
+    migrateTask(data.journal,data.currLog,task)
 
 def checkSortByMenuSelections(data):
     i=1
@@ -675,7 +512,9 @@ def checkEditScreenSelections(data):
               data.isUpdatingName=True
               data.inHourField=False
               data.inMinuteField=False
-              data.currLog.addItem(Task(""))
+              newTask=Task("")
+              data.currLog.addItem(newTask)
+              data.currLog.startEditingTask(newTask)
         else: data.isUpdatingName=False
         #group field
         groupFieldx0,groupFieldy0=data.nameFieldx0*9/8+data.outerMarginX,data.nameFieldy1*9/8
@@ -692,6 +531,7 @@ def checkEditScreenSelections(data):
             if data.currTask==None or data.currTask.name=="": data.createNameErrorMessage=True
             else:
                 data.selectTimeScreen=True
+                updateTimeConflicts(data,data.currTask) #the warning is for this task's time, not the last one's
         #duration field
         if data.durationHourx0<data.x<data.durationHourx1 and data.durationHoury0<data.y<data.durationHoury1:
             if data.currTask==None or data.currTask.name=="": data.createNameErrorMessage=True
@@ -711,18 +551,17 @@ def checkEditScreenSelections(data):
                 data.createNameErrorMessage=True
             elif durationCorrect(data):
                 data.isEditScreen=False
-                data.currTask.selected=False
+                data.currLog.deselectAll()
                 data.currLog.stopEditingTask()
-                data.previousTaskState=None
+                data.journal.history.finishStep()
+                updateTimeConflicts(data,None)
             else: data.createDurationErrorMessage=True
         #exit button
         if data.taskexitx0<data.x<data.taskexitx1 and data.taskexity0<data.y<data.taskexity1:
             data.isEditScreen=False
             data.currLog.stopEditingTask()
-            if data.previousTaskState==None or data.previousTaskState.name=="empty":
-                data.currLog.deleteItem(data.currTask)
-            else: data.currLog.replaceTask(data,data.currTask,data.previousTaskState)
-            data.previousTaskState=None
+            data.journal.history.discardStep() #puts the task back the way it was, or takes a new one out
+            updateTimeConflicts(data,None)
         #exit button of error message
         if data.createNameErrorMessage or data.createDurationErrorMessage:
             data.inHourField=False
@@ -733,67 +572,43 @@ def checkEditScreenSelections(data):
               data.createDurationErrorMessage=False
 
 def checkTimeScreenSelections(data):
-    if data.timesubmitx0<data.x<data.timesubmitx1 and data.timesubmity0<data.y<data.timesubmity1:
+    layout=getLayout(data,timeScreenLayout)
+    if layout.submit.contains(data.x,data.y):
            data.selectTimeScreen=False
-    div=(data.width-data.timeMarginX*9/2)/12
-    numOfDivs=12
-    for hourNum in range(1,numOfDivs+1):
-        if (data.timeMarginX*3+div*(hourNum-1)<data.x<data.timeMarginX*3+div*hourNum
-            and data.timeMarginY*22/16<data.y<data.timeMarginY*24/16):
-            data.currTask.selectedHour=hourNum
+    for (hourNum,box) in layout.hourBoxes:
+        if box.contains(data.x,data.y):
+            data.editor.selectedHour=hourNum
             break
-    for minuteNum in range(0,(numOfDivs)*5,5):
-        if (data.timeMarginX*3+div*minuteNum/5<data.x<data.timeMarginX*3+div*(minuteNum/5+1)
-            and data.timeMarginY*28/16<data.y<data.timeMarginY*30/16):
-            data.currTask.selectedMinute=minuteNum
+    for (minuteNum,box) in layout.minuteBoxes:
+        if box.contains(data.x,data.y):
+            data.editor.selectedMinute=minuteNum
             break
-    if (data.timeMarginX*3<data.x<data.timeMarginX*3+div*2
-        and data.timeMarginY*25/16<data.y<data.timeMarginY*27/16):
-        data.currTask.selectedAMPM="AM"
-    elif (data.timeMarginX*3+div*2<data.x<data.timeMarginX*3+div*4
-        and data.timeMarginY*25/16<data.y<data.timeMarginY*27/16):
-        data.currTask.selectedAMPM="PM"
-    #adjust the hour according the "AM" or "PM"
-    if data.currTask.selectedAMPM=="AM":
-        if data.currTask.selectedHour==12: hour=0
-        else: hour=data.currTask.selectedHour
-    else:
-        if data.currTask.selectedHour==12: hour=data.currTask.selectedHour
-        else: hour=data.currTask.selectedHour+12
-    data.currTask.assignedTime=datetime.datetime(data.year,data.month,data.day,hour,data.currTask.selectedMinute)
+    for (ampm,box) in layout.ampmBoxes:
+        if box.contains(data.x,data.y): data.editor.selectedAMPM=ampm
+    data.currTask.assignedTime=data.editor.getSelectedTime(data.currLog.date)
+    updateTimeConflicts(data,data.currTask)
+
+def updateTimeConflicts(data,task): #what the time picker warns about for task, or nothing if it's None
+    data.timeConflicts=[] if task==None else data.currLog.getConflicts(task)
+    data.nextFreeTime=getNextFreeTime(data.currLog,task) if len(data.timeConflicts)>0 else None
 
 def checkQuestionScreenSelections(data):
     question=data.currDaySched.questions[data.currQuestionIndex]
     answersList=question.possibleAnswers
-    numAnswers=len(answersList)
-    #if there are more than 4 possible answers, split them two lines:
-    splitIndex=numAnswers//2 if numAnswers>data.maxAnswersPerLine else numAnswers
-    answersPerLine=numAnswers-splitIndex if splitIndex<numAnswers else numAnswers
-    distanceBetweenRectangles=(data.width*5/8)/answersPerLine
-    margin=1/256
-    if numAnswers>answersPerLine: #two lines
-        for i in range(splitIndex):
-            if (data.width*3/16+distanceBetweenRectangles*(i+1/2)+margin<data.x<data.width*3/16+distanceBetweenRectangles*(i+3/2)-margin
-                and data.height*18/32<data.y<data.height*20/32):
-                answer=answersList[i]
-                data.currDaySched.questions[data.currQuestionIndex].answer=answer
-                data.currQuestionIndex+=1
-        for i in range(numAnswers-splitIndex):
-            if (data.width*3/16+distanceBetweenRectangles*i+margin<data.x<data.width*3/16+distanceBetweenRectangles*(i+1)-margin
-                and data.height*21/32<data.y<data.height*23/32):
-                answer=answersList[i+splitIndex]
-                data.currDaySched.questions[data.currQuestionIndex].answer=answer
-                data.currQuestionIndex+=1
-    else: #one line
-        for i in range(numAnswers):
-            if (data.width*3/16+distanceBetweenRectangles*i+margin<data.x<data.width*3/16+distanceBetweenRectangles*(i+1)-margin
-                and data.height*20/32<data.y<data.height*22/32):
-                answer=answersList[i]
-                data.currDaySched.questions[data.currQuestionIndex].answer=answer
-                data.currQuestionIndex+=1
+    layout=getLayout(data,questionScreenLayout,len(answersList))
+    for i in range(len(answersList)):
+        if layout.answerButtons[i][2].contains(data.x,data.y):
+            question.answer=answersList[i]
+            data.currQuestionIndex+=1
+            break
     if data.currQuestionIndex==len(data.currDaySched.questions):
         data.isQuestionScreen=False
-        interpretAnswers(data)
+        startPlanning(data)
+
+def checkPlanningScreenSelections(data):
+    #cancel button
+    if data.cancelx0<data.x<data.cancelx1 and data.cancely0<data.y<data.cancely1:
+        cancelPlanning(data)
 
 def checkScheduleScreenSelections(data):
     #menu button
@@ -806,9 +621,21 @@ def checkScheduleErrorScreenSelections(data):
         data.scheduleError=False
         data.isMenu=True
 
+#mouseWheel functions:
+
+def mouseWheel(event, data):
+    #Windows and macOS send <MouseWheel> with a delta, X11 sends it as buttons 4 and 5
+    if event.num==4 or event.delta>0: numRows=-1
+    elif event.num==5 or event.delta<0: numRows=1
+    else: return
+    if data.isDailyLog and not data.isEditScreen:
+        scrollItemList(data,numRows)
+        markDirty(data)
+
 #everything else:
 
 def keyPressed(event, data):
+    updateCurrentTask(data)
     if data.isOpeningScreen:
         if event.keysym=="Return":
             #user did not enter anything:
@@ -829,25 +656,45 @@ def keyPressed(event, data):
             elif event.keysym=="BackSpace": data.currTask.name=data.currTask.name[:-1]
         elif data.inHourField:
             if event.keysym in string.digits:
-                if len(data.currTask.durationHour)==2: pass
-                else: data.currTask.durationHour+=event.keysym
-            elif event.keysym=="BackSpace": data.currTask.durationHour=data.currTask.durationHour[:-1]
+                if len(data.editor.durationHour)==2: pass
+                else: data.editor.durationHour+=event.keysym
+            elif event.keysym=="BackSpace": data.editor.durationHour=data.editor.durationHour[:-1]
         elif data.inMinuteField:
             if event.keysym in string.digits:
-                if len(data.currTask.durationMinute)==2: pass
-                else: data.currTask.durationMinute+=event.keysym
-            elif event.keysym=="BackSpace": data.currTask.durationMinute=data.currTask.durationMinute[:-1]
+                if len(data.editor.durationMinute)==2: pass
+                else: data.editor.durationMinute+=event.keysym
+            elif event.keysym=="BackSpace": data.editor.durationMinute=data.editor.durationMinute[:-1]
+    elif data.isDailyLog and event.state&data.controlMask:
+        if event.keysym in ("z","Z"): changeHistory(data,data.journal.history.undo)
+        elif event.keysym in ("y","Y"): changeHistory(data,data.journal.history.redo)
+    updateCurrentTask(data)
+    markDirty(data)
 
 def timerFired(data):
     #make fields have blinkingCursor
-    data.itemList=data.currLog.getSortedList(data.sortMode)
     data.timesFired+=1
-    data.currTask=data.currLog.getEditingTask()
-    if (data.isEditingUsername or data.isUpdatingName or data.inHourField or data.inMinuteField) and data.timesFired%6==0:
+    previousCursor=data.blinkingCursor
+    if isTyping(data) and data.timesFired%6==0:
         if data.blinkingCursor==" ": data.blinkingCursor="|"
         else: data.blinkingCursor=" "
     elif data.isEditingUsername==False: data.blinkingCursor=" "
     elif data.isUpdatingName==False: data.blinkingCursor=" "
+    if data.blinkingCursor!=previousCursor: markDirty(data)
+    #check on the schedule being planned in the background
+    if data.isPlanningScreen:
+        if data.planningJob.isDone(): interpretAnswers(data)
+        markDirty(data)
+
+def isTyping(data):
+    return data.isEditingUsername or data.isUpdatingName or data.inHourField or data.inMinuteField
+
+def isAnimating(data): #the timer only needs to run while something on screen changes by itself
+    return isTyping(data) or data.blinkingCursor!=" " or data.isPlanningScreen
+
+def updateCurrentTask(data):
+    data.currTask=data.currLog.getEditingTask()
+    if data.currTask==None: data.editor=None
+    elif data.editor==None or data.editor.task is not data.currTask: data.editor=TaskEditor(data.currTask)
 
 def redrawAll(canvas, data):
     if data.isOpeningScreen:
@@ -863,24 +710,141 @@ def redrawAll(canvas, data):
             if data.selectTimeScreen: drawSelectTimeScreen(canvas,data)
         elif data.showSortByDropdown: drawSortByDropdown(canvas,data)
     elif data.isQuestionScreen: drawQuestionScreen(canvas,data)
+    elif data.isPlanningScreen: drawPlanningScreen(canvas,data)
     elif data.isScheduleScreen: drawScheduleScreen(canvas,data)
     elif data.isHelp: drawHelpScreen(canvas,data)
     elif data.scheduleError: drawScheduleError(canvas,data)
 
+####################################
+# Retained canvas
+####################################
+
+class RetainedCanvas(object):
+    #stands in for the Tk canvas in the draw functions. Instead of deleting and recreating everything
+    #each frame, it remembers the items it made under stable tags and only updates the ones that changed
+    def __init__(self,canvas):
+        self.canvas=canvas
+        self.items={} #tag -> (itemId,kind,coords,options)
+        self.stackOrder=[] #tags in the order they're stacked on the canvas
+        self.beginFrame()
+
+    def beginFrame(self):
+        self.sections=[[(),{},0]] #[path,number of calls per draw function,number of items made]
+        self.frameOrder=[]
+        self.created=set()
+        self.createdOrder=[]
+
+    def enterSection(self,name):
+        path,calls,numItems=self.sections[-1]
+        callIndex=calls.get(name,0)
+        calls[name]=callIndex+1
+        self.sections.append([path+((name,callIndex),),{},0])
+
+    def exitSection(self):
+        self.sections.pop()
+
+    def getNextTag(self):
+        section=self.sections[-1]
+        tag=(section[0],section[2])
+        section[2]+=1
+        return tag
+
+    def draw(self,kind,coords,options):
+        tag=self.getNextTag()
+        old=self.items.get(tag)
+        if old!=None and old[1]==kind and old[3].keys()==options.keys():
+            itemId=old[0]
+            if old[2]!=coords: self.canvas.coords(itemId,*coords)
+            changed={}
+            for option in options:
+                if old[3][option]!=options[option]: changed[option]=options[option]
+            if len(changed)>0: self.canvas.itemconfig(itemId,**changed)
+        else:
+            if old!=None: self.canvas.delete(old[0])
+            create=getattr(self.canvas,"create_"+kind)
+            itemId=create(*coords,tags=getTagString(tag),**options)
+            self.created.add(tag)
+            self.createdOrder.append(tag)
+        self.items[tag]=(itemId,kind,coords,options)
+        self.frameOrder.append(tag)
+        return itemId
+
+    def endFrame(self):
+        drawn=set(self.frameOrder)
+        for tag in self.stackOrder:
+            if tag not in drawn:
+                self.canvas.delete(self.items.pop(tag)[0])
+        #new items go on top of the stack, so restack everything from the first item that's out of place
+        stack=[tag for tag in self.stackOrder if tag in drawn and tag not in self.created]+self.createdOrder
+        for i in range(len(self.frameOrder)):
+            if stack[i]!=self.frameOrder[i]:
+                for tag in self.frameOrder[i:]:
+                    self.canvas.tag_raise(self.items[tag][0])
+                break
+        self.stackOrder=self.frameOrder
+
+    def create_rectangle(self,*coords,**options): return self.draw("rectangle",coords,options)
+    def create_oval(self,*coords,**options): return self.draw("oval",coords,options)
+    def create_line(self,*coords,**options): return self.draw("line",coords,options)
+    def create_polygon(self,*coords,**options): return self.draw("polygon",coords,options)
+    def create_text(self,*coords,**options): return self.draw("text",coords,options)
+    def create_image(self,*coords,**options): return self.draw("image",coords,options)
+
+def tagged(drawFunction): #lets a RetainedCanvas tag the items a draw function makes
+    def wrapper(canvas,*args):
+        canvas.enterSection(drawFunction.__name__)
+        result=drawFunction(canvas,*args)
+        canvas.exitSection()
+        return result
+    return wrapper
+
+def getTagString(tag): #e.g. "drawItemList.0/drawBullet.3#1"
+    path,itemIndex=tag
+    return "/".join("%s.%d" % section for section in path)+"#"+str(itemIndex)
+
+####################################
+# Assets
+####################################
+
+class AssetManager(object):
+    #loads each image from directory the first time it's asked for and keeps it after that. Set
+    #afterIdle (e.g. to a widget's after_idle) to let prefetch load images when Tk has nothing to do.
+    def __init__(self,directory):
+        self.directory=directory
+        self.images={} #file name -> PhotoImage
+        self.prefetching=set() #file names waiting to be loaded by afterIdle
+        self.afterIdle=None
+
+    def getPath(self,name):
+        return os.path.join(self.directory,name)
+
+    def getImage(self,name):
+        if name not in self.images:
+            self.images[name]=PhotoImage(file=self.getPath(name))
+            self.prefetching.discard(name)
+        return self.images[name]
+
+    def prefetch(self,name): #load name soon, without holding up what's being done now
+        if name in self.images or name in self.prefetching or self.afterIdle==None: return
+        self.prefetching.add(name)
+        self.afterIdle(self.getImage,name)
+
 ####################################
 # Draw functions
 ####################################
 
 #Opening
+@tagged
 def drawOpeningScreen(canvas,data):
-    canvas.create_image(data.width/2,data.height*3/8,image=data.enterUsernameImage)
+    canvas.create_image(data.width/2,data.height*3/8,image=data.assets.getImage("enterUsernameText.gif"))
     nameField=data.username+data.blinkingCursor
     canvas.create_text(data.width/2,data.height*19/32,text=nameField,font="Cambria 26")
     canvas.create_line(data.width/8,data.height*5/8,data.width*7/8,data.height*5/8)
     canvas.create_rectangle(data.width/3,data.height*3/4,data.width*2/3,data.height*13/16,fill=data.color1)
-    canvas.create_image(data.width/2,data.height*25/32,image=data.submitButtonImage)
+    canvas.create_image(data.width/2,data.height*25/32,image=data.assets.getImage("submitbutton.gif"))
     canvas.create_text(data.width/2,data.height*29/32,text="Click 'Submit' or press 'Enter' to continue",font="Verdana 14")
 
+@tagged
 def drawErrorScreen(canvas,data):
     #shadow
     canvas.create_rectangle(data.errorMarginX+data.shadowMargin,
@@ -898,30 +862,34 @@ def drawErrorScreen(canvas,data):
     canvas.create_line(data.errorexitx1,data.errorexity0,data.errorexitx0,data.errorexity1,width=2)
 
 #Menu
+@tagged
 def drawMenu(canvas,data):
     canvas.create_text(data.width/2,data.height/8, text=data.username+"'s Bullet Journal", font="Verdana 28")
-    canvas.create_image(data.width/2,data.height*11/32,image=data.dailyLogImage)
-    canvas.create_image(data.width/2,data.height*20/32,image=data.planMyDayImage)
-    canvas.create_image(data.width/2,data.height*28/32,image=data.helpButtonImage)
+    canvas.create_image(data.width/2,data.height*11/32,image=data.assets.getImage("dailylogbutton.gif"))
+    canvas.create_image(data.width/2,data.height*20/32,image=data.assets.getImage("planmydaybutton.gif"))
+    canvas.create_image(data.width/2,data.height*28/32,image=data.assets.getImage("helpbutton.gif"))
 
 #Help
+@tagged
 def drawHelpScreen(canvas,data):
-    if data.isHelpScreen1: image=data.helpScreen1
-    elif data.isHelpScreen2: image=data.helpScreen2
-    elif data.isHelpScreen3: image=data.helpScreen3
-    elif data.isHelpScreen4: image=data.helpScreen4
-    elif data.isHelpScreen5: image=data.helpScreen5
-    elif data.isHelpScreen6: image=data.helpScreen6
-    canvas.create_image(data.width/2,data.height/2,image=image)
+    if data.isHelpScreen1: page=1
+    elif data.isHelpScreen2: page=2
+    elif data.isHelpScreen3: page=3
+    elif data.isHelpScreen4: page=4
+    elif data.isHelpScreen5: page=5
+    elif data.isHelpScreen6: page=6
+    canvas.create_image(data.width/2,data.height/2,image=data.assets.getImage("help%d.gif" % page))
+    #read the next page while the user is reading this one, so turning the page doesn't stall
+    if page<6: data.assets.prefetch("help%d.gif" % (page+1))
 
 #Daily Log
+@tagged
 def drawDailyLog(canvas,data):
-    canvas.create_image(data.width/2,data.height/16,image=data.smallDailyLogImage)
+    canvas.create_image(data.width/2,data.height/16,image=data.assets.getImage("smalldailylogbutton.gif"))
     #date and arrows
-    canvas.create_polygon(data.width/8,data.height/7,data.width/8+data.arrowSize,data.height/7-data.arrowSize,
-                        data.width/8+data.arrowSize,data.height/7+data.arrowSize,fill=data.color2,outline="black")
-    canvas.create_polygon(data.width*7/8,data.height/7,data.width*7/8-data.arrowSize,data.height/7-data.arrowSize,
-                        data.width*7/8-data.arrowSize,data.height/7+data.arrowSize,fill=data.color2,outline="black")
+    arrows=getLayout(data,dateArrowsLayout)
+    canvas.create_polygon(*arrows.left.getPoints(),fill=data.color2,outline="black")
+    canvas.create_polygon(*arrows.right.getPoints(),fill=data.color2,outline="black")
     drawDate(canvas,data)
     #"sort by" dropdown
     drawSortByMenu(canvas,data)
@@ -936,8 +904,9 @@ def drawDailyLog(canvas,data):
         text="+",font="Times 32")
     #menu button
     canvas.create_rectangle(data.width*1/32,data.height*29/32,data.width*5/32,data.height*31/32,fill=data.color2)
-    canvas.create_image(data.width*4/32,data.height*15/16,image=data.menuButtonImage)
+    canvas.create_image(data.width*4/32,data.height*15/16,image=data.assets.getImage("menubutton.gif"))
 
+@tagged
 def drawDate(canvas,data):
     date=data.currLog.date
     month="0"+str(date.month) if date.month<10 else str(date.month)
@@ -948,18 +917,24 @@ def drawDate(canvas,data):
     canvas.create_rectangle(data.width*9/16,data.height*7/56,data.width*3/4,data.height*9/56,fill=data.color2,width=2)
     canvas.create_text(data.width*21/32,data.height/7,text="Today",font="Cambria 12")
 
+@tagged
 def drawItemList(canvas,data):
-    for item in data.itemList:
-        bulletx0,bullety0=data.width/4-data.bulletDim/2,data.height/4+(item.row+1)*data.taskMargin-data.bulletDim/2
+    itemList=data.currLog.getSortedList(data.sortMode)
+    getItemHitIndex(data,itemList) #so the next click doesn't have to lay the list out again
+    #only the rows in the task box are drawn, so a long day costs no more to draw than a short one
+    for i in getVisibleIndexes(data,itemList):
+        item=itemList[i]
+        bulletx0,bullety0=data.width/4-data.bulletDim/2,getRowY(data,item.row)-data.bulletDim/2
         bulletx1,bullety1=bulletx0+data.bulletDim,bullety0+data.bulletDim
         drawBullet(canvas,item.marking,item,data,bulletx0,bullety0,bulletx1,bullety1)
-        canvas.create_text(data.width*3/8,data.height/4+(item.row+1)*data.taskMargin,text=item.name,anchor=W,font="Cambria 12")
+        canvas.create_text(data.width*3/8,getRowY(data,item.row),text=item.name,anchor=W,font=data.itemListFont)
         if item.selected: drawTaskDropdown(canvas,item,data)
 
+@tagged
 def drawBullet(canvas,marking,item,data,x0,y0,x1,y1):
     bulletDim=x1-x0
     width=bulletDim*.2
-    canvas.create_rectangle(x0,y0,x1,y1,fill=item.getColor(data))
+    canvas.create_rectangle(x0,y0,x1,y1,fill=item.getColor(data.backgroundColor))
     if marking=="incomplete": pass
     elif marking=="started": canvas.create_line(x0,y0,x1,y1,width=width)
     elif marking=="migrated":
@@ -969,9 +944,10 @@ def drawBullet(canvas,marking,item,data,x0,y0,x1,y1):
     elif marking=="completed": canvas.create_rectangle(x0+bulletDim/8,y0+bulletDim/8,x1-bulletDim/8,y1-bulletDim/8,fill="black")
     elif marking=="cancelled": canvas.create_line(x0,y0+bulletDim/2,x1,y0+bulletDim/2,width=width)
 
+@tagged
 def drawTaskDropdown(canvas,task,data):
     data.currTask=data.currLog.getSelectedTask()
-    x,y=data.width/4-data.bulletDim/2,data.height/4+(task.row+1)*data.taskMargin+data.bulletDim/2+data.taskDropDownM
+    x,y=data.width/4-data.bulletDim/2,getRowY(data,task.row)+data.bulletDim/2+data.taskDropDownM
     canvas.create_rectangle(x,y,x+data.bulletDim,y+3.3*data.bulletDim)
     bulletx0=x+data.taskDropDownM
     bulletx1=bulletx0+data.bulletDim-data.taskDropDownM*2
@@ -997,6 +973,7 @@ def drawTaskDropdown(canvas,task,data):
     if assignedTimeText==":": assignedTimeText="No assigned time"
     canvas.create_text(data.editx0*33/32,edity1*36/32,text=assignedTimeText,anchor=W,font="Cambria 8")
 
+@tagged
 def drawSortByMenu(canvas,data):
     canvas.create_text(data.width/3,data.height/5+data.sortDropDownHeight/2,text="Sort by:",font="Cambria 12")
     canvas.create_rectangle(data.width/3+data.sortDropDownM,data.height/5,data.width*2/3,
@@ -1004,6 +981,7 @@ def drawSortByMenu(canvas,data):
     canvas.create_text(data.width/2+data.sortDropDownM/2,data.height/5+data.sortDropDownHeight/2,
         text=getSortModeString(data.sortMode),font="Cambria 10")
 
+@tagged
 def drawSortByDropdown(canvas,data):
     x0,x1=data.width/3+data.sortDropDownM,data.width*2/3
     i=1
@@ -1015,6 +993,7 @@ def drawSortByDropdown(canvas,data):
                     text=getSortModeString(sortMode),font="Cambria 8")
             i+=1
 
+@tagged
 def drawTaskEditScreen(canvas,data):
     task=data.currTask
     #outer box shadow
@@ -1039,7 +1018,7 @@ def drawTaskEditScreen(canvas,data):
     #group field
     groupX,groupY=data.nameFieldx0*9/8,data.nameFieldy1*9/8
     canvas.create_text(groupX,groupY,text="Group:",font="Cambria 12",anchor=NW)
-    groupColor=data.backgroundColor if task==None else task.getColor(data)
+    groupColor=data.backgroundColor if task==None else task.getColor(data.backgroundColor)
     groupText="None" if task==None else task.group
     canvas.create_rectangle(groupX+data.outerMarginX,groupY,groupX+data.outerMarginX+data.bulletDim,
         groupY+data.bulletDim,fill=groupColor)
@@ -1062,8 +1041,8 @@ def drawTaskEditScreen(canvas,data):
     canvas.create_text(data.durationX,data.durationY,text="Duration:",font="Cambria 12",anchor=NW)
     canvas.create_text(data.nameFieldx1,data.durationY*17/16,text="*this field is required",font="Cambria 8",anchor=E)
     #text for duration fields
-    if task==None: durationHour,durationMinute="0","0"
-    else: durationHour,durationMinute=task.durationHour,task.durationMinute
+    if data.editor==None: durationHour,durationMinute="0","0"
+    else: durationHour,durationMinute=data.editor.durationHour,data.editor.durationMinute
     hourText=str(durationHour)+data.blinkingCursor if data.inHourField else str(durationHour)
     minuteText=str(durationMinute)+data.blinkingCursor if data.inMinuteField else str(durationMinute)
     canvas.create_rectangle(data.durationHourx0,data.durationHoury0,data.durationHourx1,data.durationHoury1)
@@ -1075,12 +1054,11 @@ def drawTaskEditScreen(canvas,data):
         text="Minutes",font="Cambria 10")
     canvas.create_text(data.durationMinutex0+data.bulletDim/4,data.durationMinutey0/2+data.durationMinutey1/2,
         text=minuteText,font="Cambria 8",anchor=W)
-    canvas.create_image(data.width/2,data.height*26/32,image=data.smallSubmitButtonImage)
+    canvas.create_image(data.width/2,data.height*26/32,image=data.assets.getImage("smallsubmitbutton.gif"))
 
+@tagged
 def drawSelectTimeScreen(canvas,data):
-    div=(data.width-data.timeMarginX*9/2)/12
-    numOfDivs=12
-    minsPerDiv=5
+    layout=getLayout(data,timeScreenLayout)
     #shadow
     canvas.create_rectangle(data.timeMarginX+data.shadowMargin,data.timeMarginY+data.shadowMargin,
         data.width-data.timeMarginX+data.shadowMargin,data.height-data.timeMarginY+data.shadowMargin,fill="gray")
@@ -1091,46 +1069,47 @@ def drawSelectTimeScreen(canvas,data):
     canvas.create_text(data.width/2,data.timeMarginY*19/16,text="Edit Time",font="Cambria 20")
     #hour label
     canvas.create_text(data.timeMarginX*2,data.timeMarginY*23/16,text="Hour:",font="Cambria 14")
-    canvas.create_rectangle(data.timeMarginX*3,data.timeMarginY*11/8,data.width-data.timeMarginX*3/2,data.timeMarginY*3/2)
+    bar=layout.hourBar
+    canvas.create_rectangle(bar.x0,bar.y0,bar.x1,bar.y1)
     #minute label
     canvas.create_text(data.timeMarginX*2,data.timeMarginY*29/16,text="Minute:",font="Cambria 14")
-    canvas.create_rectangle(data.timeMarginX*3,data.timeMarginY*28/16,data.width-data.timeMarginX*3/2,data.timeMarginY*30/16)
-    divNum=1
-    while divNum<numOfDivs+1:
+    bar=layout.minuteBar
+    canvas.create_rectangle(bar.x0,bar.y0,bar.x1,bar.y1)
+    for (hourNum,box) in layout.hourBoxes:
         #hour text
-        hourText=str(divNum) if divNum>=10 else "0"+str(divNum)
-        canvas.create_line(data.timeMarginX*3+div*divNum,data.timeMarginY*22/16,
-            data.timeMarginX*3+div*divNum,data.timeMarginY*24/16)
-        canvas.create_text(data.timeMarginX*3+div*(divNum-1)+div/2,data.timeMarginY*23/16,text=hourText,font="Cambria 8")
+        hourText=str(hourNum) if hourNum>=10 else "0"+str(hourNum)
+        canvas.create_line(box.x1,box.y0,box.x1,box.y1)
+        canvas.create_text(*box.getCenter(),text=hourText,font="Cambria 8")
         #highlight selected hour
-        if data.currTask.selectedHour==divNum:
-            canvas.create_rectangle(data.timeMarginX*3+div*(divNum-1),data.timeMarginY*22/16,
-                data.timeMarginX*3+div*divNum,data.timeMarginY*24/16,outline=data.color2,width=2)
+        if data.editor.selectedHour==hourNum:
+            canvas.create_rectangle(box.x0,box.y0,box.x1,box.y1,outline=data.color2,width=2)
+    for (minuteNum,box) in layout.minuteBoxes:
         #minute text
-        minuteText=str((divNum-1)*minsPerDiv) if (divNum-1)*minsPerDiv>=10 else "0"+str((divNum-1)*minsPerDiv)
-        canvas.create_line(data.timeMarginX*3+div*divNum,data.timeMarginY*28/16,
-            data.timeMarginX*3+div*divNum,data.timeMarginY*30/16)
-        canvas.create_text(data.timeMarginX*3+div*(divNum-1)+div/2,data.timeMarginY*29/16,text=minuteText,font="Cambria 8")
+        minuteText=str(minuteNum) if minuteNum>=10 else "0"+str(minuteNum)
+        canvas.create_line(box.x1,box.y0,box.x1,box.y1)
+        canvas.create_text(*box.getCenter(),text=minuteText,font="Cambria 8")
         #highlight selected minute
-        if data.currTask.selectedMinute==(divNum-1)*5:
-            canvas.create_rectangle(data.timeMarginX*3+div*(divNum-1),data.timeMarginY*28/16,
-                data.timeMarginX*3+div*divNum,data.timeMarginY*30/16,outline=data.color2,width=2)
-        divNum+=1
+        if data.editor.selectedMinute==minuteNum:
+            canvas.create_rectangle(box.x0,box.y0,box.x1,box.y1,outline=data.color2,width=2)
     #AM or PM
-    canvas.create_rectangle(data.timeMarginX*3,data.timeMarginY*25/16,data.timeMarginX*3+div*4,data.timeMarginY*27/16)
-    canvas.create_line(data.timeMarginX*3+div*2,data.timeMarginY*25/16,data.timeMarginX*3+div*2,data.timeMarginY*27/16)
-    canvas.create_text(data.timeMarginX*3+div,data.timeMarginY*26/16,text="AM",font="Cambria 10")
-    canvas.create_text(data.timeMarginX*3+div*3,data.timeMarginY*26/16,text="PM",font="Cambria 10")
+    bar=layout.ampmBar
+    canvas.create_rectangle(bar.x0,bar.y0,bar.x1,bar.y1)
+    for (ampm,box) in layout.ampmBoxes:
+        if box.x0>bar.x0: canvas.create_line(box.x0,box.y0,box.x0,box.y1)
+        canvas.create_text(*box.getCenter(),text=ampm,font="Cambria 10")
     #highlight selected AMPM
-    if data.currTask.selectedAMPM=="AM":
-        canvas.create_rectangle(data.timeMarginX*3,data.timeMarginY*25/16,
-            data.timeMarginX*3+div*2,data.timeMarginY*27/16,outline=data.color2,width=2)
-    else:
-        canvas.create_rectangle(data.timeMarginX*3+div*2,data.timeMarginY*25/16,
-            data.timeMarginX*3+div*4,data.timeMarginY*27/16,outline=data.color2,width=2)
+    for (ampm,box) in layout.ampmBoxes:
+        if data.editor.selectedAMPM==ampm:
+            canvas.create_rectangle(box.x0,box.y0,box.x1,box.y1,outline=data.color2,width=2)
+    #warn about tasks the picked time overlaps
+    if len(data.timeConflicts)>0:
+        conflictText="Overlaps with: "+", ".join(task.name for task in data.timeConflicts)
+        if data.nextFreeTime!=None: conflictText+=" (free at "+getTimeText(data.nextFreeTime)+")"
+        canvas.create_text(data.width/2,data.timeMarginY*31/16,text=conflictText,font="Cambria 10",fill="red")
     #submit button
-    canvas.create_image(data.width/2,data.timesubmity0/2+data.timesubmity1/2,image=data.smallSubmitButtonImage)
+    canvas.create_image(data.width/2,data.timesubmity0/2+data.timesubmity1/2,image=data.assets.getImage("smallsubmitbutton.gif"))
 
+@tagged
 def drawNameErrorMessage(canvas,data):
     #shadow
     canvas.create_rectangle(data.errorMarginX+data.shadowMargin,data.errorMarginY+data.shadowMargin,
@@ -1145,6 +1124,7 @@ def drawNameErrorMessage(canvas,data):
     canvas.create_line(data.errorexitx0,data.errorexity0,data.errorexitx1,data.errorexity1,width=2)
     canvas.create_line(data.errorexitx1,data.errorexity0,data.errorexitx0,data.errorexity1,width=2)
 
+@tagged
 def drawDurationErrorMessage(canvas,data):
     #shadow
     canvas.create_rectangle(data.errorMarginX+data.shadowMargin,data.errorMarginY+data.shadowMargin,
@@ -1160,9 +1140,10 @@ def drawDurationErrorMessage(canvas,data):
     canvas.create_line(data.errorexitx1,data.errorexity0,data.errorexitx0,data.errorexity1,width=2)
 
 #Plan My Day!
+@tagged
 def drawQuestionScreen(canvas,data):
     question=data.currDaySched.questions[data.currQuestionIndex]
-    canvas.create_image(data.width/2,data.height/8,image=data.smallPlanMyDayImage)
+    canvas.create_image(data.width/2,data.height/8,image=data.assets.getImage("smallplanmydaybutton.gif"))
     #current question in the middle
     canvas.create_oval(data.width/10,data.height*2/7,data.width*9/10,data.height*6/7,fill=data.color1)
     maxCharactersPerLine=30
@@ -1178,33 +1159,41 @@ def drawQuestionScreen(canvas,data):
     canvas.create_text(data.width/2,data.height*17/32,text=questionString[questionSplitIndex:],font="Cambria 18")
     #answer buttons
     answersList=question.possibleAnswers
-    numAnswers=len(answersList)
-    answerSplitIndex=numAnswers//2 if numAnswers>data.maxAnswersPerLine else numAnswers
-    answersPerLine=numAnswers-answerSplitIndex if answerSplitIndex<numAnswers else numAnswers
-    distanceBetweenRectangles=(data.width*5/8)/answersPerLine
-    if numAnswers>data.maxAnswersPerLine:
-        for i in range(answerSplitIndex):
-            canvas.create_image(data.width*3/16+distanceBetweenRectangles*(i+1),data.height*19/32,image=data.smallBlankButton)
-            canvas.create_text(data.width*3/16+distanceBetweenRectangles*(i+1),data.height*19/32,text=answersList[i],font="Cambria 16")
-        for i in range(numAnswers-answerSplitIndex):
-            canvas.create_image(data.width*3/16+distanceBetweenRectangles*(i+1/2),data.height*22/32,image=data.smallBlankButton)
-            canvas.create_text(data.width*3/16+distanceBetweenRectangles*(i+1/2),
-                data.height*22/32,text=answersList[answerSplitIndex+i],font="Cambria 16")
-    else:
-        for i in range(numAnswers):
-            canvas.create_image(data.width*3/16+distanceBetweenRectangles*(i+1/2),data.height*21/32,image=data.smallBlankButton)
-            canvas.create_text(data.width*3/16+distanceBetweenRectangles*(i+1/2),
-                data.height*21/32,text=answersList[i],font="Cambria 16")
-
+    layout=getLayout(data,questionScreenLayout,len(answersList))
+    for i in range(len(answersList)):
+        x,y,box=layout.answerButtons[i]
+        canvas.create_image(x,y,image=data.assets.getImage("smallblankbutton.gif"))
+        canvas.create_text(x,y,text=answersList[i],font="Cambria 16")
+
+@tagged
+def drawPlanningScreen(canvas,data):
+    canvas.create_image(data.width/2,data.height/8,image=data.assets.getImage("smallplanmydaybutton.gif"))
+    canvas.create_oval(data.width/10,data.height*2/7,data.width*9/10,data.height*6/7,fill=data.color1)
+    dots="."*(data.timesFired//3%4)
+    canvas.create_text(data.width/2,data.height*15/32,text="Planning your day"+dots,font="Cambria 20")
+    numTried=data.planningJob.getNumTried()
+    if numTried==None: triedText="Trying a few approaches at once"
+    else: triedText="Tried %d arrangements so far" % numTried
+    canvas.create_text(data.width/2,data.height*18/32,text=triedText,font="Cambria 12")
+    #cancel button
+    canvas.create_image(data.width/2,data.cancely0/2+data.cancely1/2,image=data.assets.getImage("smallblankbutton.gif"))
+    canvas.create_text(data.width/2,data.cancely0/2+data.cancely1/2,text="Cancel",font="Cambria 16")
+
+@tagged
 def drawScheduleScreen(canvas,data):
-    canvas.create_image(data.width/2,data.height*3/32,image=data.smallPlanMyDayImage)
+    canvas.create_image(data.width/2,data.height*3/32,image=data.assets.getImage("smallplanmydaybutton.gif"))
     canvas.create_text(data.width/2,data.height*3/16,text="Ok "+data.username+", here's what I think",font="Cambria 18")
     canvas.create_text(data.width/2,data.height*15/64,text="your day should look like:",font="Cambria 18")
     canvas.create_rectangle(data.width/8,data.height*9/32,data.width*7/8,data.height*7/8,fill=data.color1)
     drawPlan(canvas,data)
+    if len(data.currDaySched.unplaced)>0:
+        unplacedNames=", ".join(task.name for task in data.currDaySched.unplaced)
+        canvas.create_text(data.width*9/16,data.height*29/32,text="Couldn't fit: "+unplacedNames,
+            font="Cambria 12",fill="red",width=data.width*5/8)
     #menu button
-    canvas.create_image(data.width*4/32,data.height*15/16,image=data.menuButtonImage)
+    canvas.create_image(data.width*4/32,data.height*15/16,image=data.assets.getImage("menubutton.gif"))
 
+@tagged
 def drawPlan(canvas,data):
     #hour labels
     hourDimY=(data.height*19/32)/data.numHoursDaily
@@ -1217,115 +1206,68 @@ def drawPlan(canvas,data):
         hourText=getHourText(hour)
         canvas.create_text(data.width/8+hourDimX/2,data.height*9/32+(2*hourDimY*hour+hourDimY)/2,
             text=hourText,font="Cambria 12")
-    #periods
+    #periods, with periods that overlap each other side by side
     periodDim=data.width/3
-    for period in data.currDaySched.schedule:
-        time=period.assignedTime
-        duration=period.duration
-        dayLength=data.currDaySched.dayLength
-        periodx0=data.width*5/8-periodDim/2
-        periodx1=data.width*5/8+periodDim/2
-        periody0=data.height*9/32+(getFloatTimeDifference(data,data.currDaySched.startTime,time))*hourDimY
-        periody1=data.height*9/32+(getFloatTimeDifference(data,data.currDaySched.startTime,time+duration))*hourDimY
-        canvas.create_rectangle(periodx0,periody0,periodx1,periody1,fill=period.getColor(data))
-        canvas.create_text(periodx0/2+periodx1/2,periody0/2+periody1/2,text=period.name,font="Cambria 10")
-
+    dayStart=data.currDaySched.getStartStamp()
+    dayEnd=data.numHoursDaily*data.minPerHour #periods running past midnight stop at the bottom
+    for block in data.currDaySched.busy.getBlocks():
+        columnDim=periodDim/len(block)
+        for column in range(len(block)):
+            start,end,period=block[column]
+            periodx0=data.width*5/8-periodDim/2+columnDim*column
+            periodx1=periodx0+columnDim
+            periody0=data.height*9/32+max(0,start-dayStart)/data.minPerHour*hourDimY
+            periody1=data.height*9/32+min(dayEnd,end-dayStart)/data.minPerHour*hourDimY
+            canvas.create_rectangle(periodx0,periody0,periodx1,periody1,fill=period.getColor(data.backgroundColor))
+            canvas.create_text(periodx0/2+periodx1/2,periody0/2+periody1/2,text=period.name,font="Cambria 10")
+
+@tagged
 def drawScheduleError(canvas,data):
-    canvas.create_image(data.width/2,data.height/2,image=data.scheduleErrorScreen)
+    canvas.create_image(data.width/2,data.height/2,image=data.assets.getImage("scheduleError.gif"))
 
 ####################################
 # Plan My Day Functions
 ####################################
 
-def createQuestions(data):
-    todayIndex=data.logList.index(data.todayLog)
-    #study question
-    try:
-        tomorrowLog=data.logList[todayIndex+1]
-        for item in tomorrowLog.itemSet:
-            for word in data.testKeyWords:
-                if word in item.name:
-                    studyQuestion=getStudyQuestion(data,item)
-                    data.currDaySched.addQuestion(studyQuestion)
-    except: pass
-    #sleep question
-    data.sleepQuestion=None
-    data.sleepQuestion=getSleepQuestion(data)
-    data.currDaySched.addQuestion(data.sleepQuestion)
-
-def getSleepQuestion(data): #determines when user should go to bed to get 8 hours of sleep
-    text="What time do you plan on waking up tomorrow?"
-    question=Question(text)
-    question.addPossibleAnswer("8:00 AM","8:30 AM","9:00 AM","9:30 AM","10:00 AM")
-    return question
-
-def getStudyQuestion(data,item):
-    text="Do you want to find time to study for tomorrow's %s?" % item.name
-    question=StudyQuestion(text,item)
-    question.addPossibleAnswer("Yes","No")
-    return question
-
-def interpretAnswers(data):
-    data.currDaySched.sleepTime=getDateTimeFromString(data,data.sleepQuestion.answer)-datetime.timedelta(hours=8)
-    sleepTask=Task("Sleep",assignedTime=data.currDaySched.sleepTime,durationHour="8",group="health")
-    data.todayLog.addItem(sleepTask)
-    for question in data.currDaySched.questions: #add the study periods as tasks
-        if isinstance(question,StudyQuestion):
-            if question.answer=="Yes":
-                studyTaskName="Study for %s" % question.test.name
-                studyTask=Task(studyTaskName,durationHour="2",group="school")
-                data.todayLog.addItem(studyTask)
-    schedule=constructSchedule(data)
-    if scheduleBlank(data,schedule):
+def startPlanning(data): #adds the tasks the answers call for and starts solving in the background
+    data.planningTasks=getAnswerTasks(data.currDaySched,data.todayLog.date)
+    data.journal.history.startStep() #finished once the plan is in, so the whole plan is undone together
+    data.todayLog.addItem(*data.planningTasks)
+    answers=[question.answer for question in data.currDaySched.questions]
+    data.planningJob=PlanningJob(data.todayLog,data.planGranularity,timeLimit=data.planTimeLimit,
+        portfolio=data.planPortfolio,cache=data.planCache,answers=answers,optimize=data.planOptimize,
+        dayStart=data.currDaySched.dayStart,dayEnd=data.currDaySched.dayEnd).start()
+    data.isPlanningScreen=True
+
+def cancelPlanning(data): #stops the solver and puts today and the questions back the way they were
+    data.planningJob.cancel()
+    data.planningJob=None
+    data.journal.history.discardStep()
+    data.planningTasks=[]
+    data.currDaySched=data.previousDaySched
+    data.currQuestionIndex=0
+    data.isPlanningScreen=False
+    data.isMenu=True
+
+def interpretAnswers(data): #called once the planning job is done
+    sleepTask=data.planningTasks[0]
+    untimedIds=set(item.itemId for item in data.planningJob.itemsWithoutTimes)
+    schedule,unplaced=data.planningJob.finish()
+    data.planningJob=None
+    data.currQuestionIndex=0
+    data.isPlanningScreen=False
+    #only an error if none of the tasks that needed a time got one
+    if len(unplaced)>0 and len(unplaced)==len(untimedIds):
         data.scheduleError=True
         data.isScheduleScreen=False
-        for item in list(data.currLog.itemSet):
-            item.isEditing=False
-            if item==sleepTask: data.currLog.deleteItem(sleepTask)
+        data.todayLog.deleteItem(sleepTask)
     else:
         data.isScheduleScreen=True
+        data.currDaySched.unplaced=unplaced
         for item in schedule:
-            item.isEditing=False
-            data.currDaySched.addPeriod(item)
-
-def scheduleBlank(data,schedule):
-    if schedule==None: return True
-    for task in schedule:
-        if task.assignedTime==None: return True
-    return False
-
-def constructSchedule(data): #backtracking!
-    schedule=[]*len(data.todayLog.itemSet)
-    itemsWithoutTimes=[]
-    for item in data.todayLog.itemSet: #add items already with an assigned time
-        if item.assignedTime!=None: schedule.append(item)
-        else: itemsWithoutTimes.append(item)
-    def isAvailable(data,testTime,duration):
-        for task in schedule:
-            if task.assignedTime<=testTime<task.assignedTime+task.duration:
-                #start time overlaps with existing tasks
-                return False
-            if (task.assignedTime<testTime+duration<task.assignedTime+task.duration
-                or testTime<task.assignedTime<testTime+duration
-                or testTime<task.assignedTime+duration<testTime+duration):
-                #duration overlaps with existing tasks
-                return False
-        return True
-    def solve(itemIndex=0):
-        if itemIndex==len(itemsWithoutTimes): return schedule
-        else:
-            item=itemsWithoutTimes[itemIndex]
-            for hour in range(data.numHoursDaily):
-                testTime=datetime.datetime(data.year,data.month,data.day,hour=hour)
-                if isAvailable(data,testTime,item.duration):
-                    item.assignedTime=testTime
-                    schedule.append(item)
-                    solution=solve(itemIndex+1)
-                    if solution!=None: return solution
-                    item.assignedTime=None
-                    schedule.remove(item)
-            return None
-    return solve()
+            data.currDaySched.addPeriod(item,planned=item.itemId in untimedIds)
+        data.currDaySched.markUpToDate(data.todayLog)
+    data.journal.history.finishStep()
 
 ####################################
 # Controller Helper Functions
@@ -1348,43 +1290,40 @@ def capitalized(str):
     updatedLetter=chr(ord(firstLetter)-32)
     return updatedLetter+str[1:]
 
+def markDirty(data): #the screen no longer matches data and needs a repaint
+    data.isDirty=True
+
+def getTextWidth(data,text,font): #measured by Tk once for each text and font, while it's in the cache
+    key=(text,font)
+    if key in data.textWidths: data.textWidths.move_to_end(key)
+    else:
+        if font not in data.fonts: data.fonts[font]=tkinter.font.Font(font=font)
+        data.textWidths[key]=data.fonts[font].measure(text)
+        if len(data.textWidths)>data.maxTextWidths: data.textWidths.popitem(last=False)
+    return data.textWidths[key]
+
 def distance(x0,y0,x1,y1):
     return ((x1-x0)**2+(y1-y0)**2)**0.5
 
 def changeDate(data,deltaDays):
     newDate=data.currLog.date+datetime.timedelta(days=deltaDays)
-    newDateIndex=getDateIndex(data.logList,newDate)
-    if newDateIndex==None:
-        data.currLog=DayLog(newDate,data)
-        addLog(data.logList,data.currLog)
-    else: data.currLog=data.logList[newDateIndex]
-
-def getDateIndex(logList,date,returnAppendLocationIfNotFound=False):
-    #binary search algorithm adapted from
-    #https://interactivepython.org/runestone/static/pythonds/SortSearch/TheBinarySearch.html
-    first=0
-    last=len(logList)-1
-    found=False
-    while first<=last and not found:
-        midpoint=(first+last)//2
-        if logList[midpoint].date==date: found=True
-        else:
-            if date<logList[midpoint].date: last=midpoint-1
-            else: first=midpoint+1
-    if found: return midpoint
-    elif returnAppendLocationIfNotFound: return first
-    else: return None
+    data.journal.save()
+    data.currLog=data.journal.getLog(newDate)
+    data.listScroll=0
 
-def addLog(logList,log):
-    index=getDateIndex(logList,log.date,True)
-    logList.insert(index,log)
+def changeHistory(data,undoOrRedo): #Control-Z and Control-Y in the Daily Log
+    if undoOrRedo():
+        data.anyTaskSelected=False
+        data.currLog.deselectAll()
+        scrollItemList(data,0) #the list may have gotten shorter
 
 def durationCorrect(data):
-    if data.currTask.durationHour.startswith("0") and data.currTask.durationMinute=="0": return False
-    if data.currTask.durationMinute!="0" and  data.currTask.durationMinute.startswith("0"): return False
-    if int(data.currTask.durationHour)>24 or int(data.currTask.durationMinute)>60: return False
-    data.currTask.duration=datetime.timedelta(hours=int(data.currTask.durationHour),minutes=int((data.currTask.durationMinute)))
-    return True
+    return data.editor.updateDuration()
+
+def getTimeText(time):
+    hour=time.hour%12 if time.hour%12!=0 else 12
+    ampm="AM" if time.hour<12 else "PM"
+    return "%d:%02d %s" % (hour,time.minute,ampm)
 
 def getHourText(hour):
     if hour==0: return str(hour+12)+":00 AM"
@@ -1392,19 +1331,6 @@ def getHourText(hour):
     elif hour==12: return str(hour)+":00 PM"
     else: return str(hour-12)+":00 PM"
 
-def getDateTimeFromString(data,timeString):
-    colonIndex=timeString.find(":")
-    hour=int(timeString[:colonIndex])
-    minuteLen=2
-    minute=int(timeString[colonIndex+1:colonIndex+1+minuteLen])
-    return datetime.datetime(data.year,data.month,data.day,hour=hour,minute=minute)
-
-def getFloatTimeDifference(data,time1,time2):
-    hour1,minute1,hour2,minute2=time1.hour,time1.minute,time2.hour,time2.minute
-    float1=hour1+minute1/data.minPerHour
-    float2=hour2+minute2/data.minPerHour
-    return (float2-float1)
-
 ####################################
 # run function
 ####################################
@@ -1412,38 +1338,84 @@ def getFloatTimeDifference(data,time1,time2):
 def run(width=300, height=300):
     root = Tk()
     def redrawAllWrapper(canvas, data):
-        canvas.delete(ALL)
-        canvas.create_rectangle(0, 0, data.width, data.height,
+        retainedCanvas.beginFrame()
+        retainedCanvas.create_rectangle(0, 0, data.width, data.height,
                                 fill=data.backgroundColor, width=0)
-        redrawAll(canvas, data)
+        redrawAll(retainedCanvas, data)
+        retainedCanvas.endFrame()
         canvas.update()
 
+    def requestRedraw(canvas, data):
+        # requests made before Tk goes idle all share one repaint
+        if data.isDirty and not data.redrawPending:
+            data.redrawPending = True
+            canvas.after_idle(redrawIfDirty, canvas, data)
+
+    def redrawIfDirty(canvas, data):
+        data.redrawPending = False
+        if data.isDirty:
+            data.isDirty = False
+            redrawAllWrapper(canvas, data)
+
+    def startTimerIfAnimating(canvas, data):
+        if isAnimating(data) and not data.timerRunning:
+            data.timerRunning = True
+            canvas.after(data.timerDelay, timerFiredWrapper, canvas, data)
+
     def mousePressedWrapper(event, canvas, data):
         mousePressed(event, data)
-        redrawAllWrapper(canvas, data)
+        requestRedraw(canvas, data)
+        startTimerIfAnimating(canvas, data)
 
     def keyPressedWrapper(event, canvas, data):
         keyPressed(event, data)
-        redrawAllWrapper(canvas, data)
+        requestRedraw(canvas, data)
+        startTimerIfAnimating(canvas, data)
+
+    def mouseWheelWrapper(event, canvas, data):
+        mouseWheel(event, data)
+        requestRedraw(canvas, data)
+
+    def configureWrapper(event, canvas, data):
+        # the window was resized, so lay every screen out again
+        resizeWindow(data, event.width, event.height)
+        requestRedraw(canvas, data)
 
     def timerFiredWrapper(canvas, data):
         timerFired(data)
-        redrawAllWrapper(canvas, data)
-        canvas.after(data.timerDelay, timerFiredWrapper, canvas, data)
+        requestRedraw(canvas, data)
+        # stop ticking once nothing is animating; the next input starts it again
+        if isAnimating(data):
+            canvas.after(data.timerDelay, timerFiredWrapper, canvas, data)
+        else: data.timerRunning = False
     class Struct(object): pass
     data = Struct()
     data.width = width
     data.height = height
     data.timerDelay = 100 # milliseconds
+    data.isDirty = True
+    data.redrawPending = False
+    data.timerRunning = False
     init(data)
-    canvas = Canvas(root, width=data.width, height=data.height)
-    canvas.pack()
+    canvas = Canvas(root, width=data.width, height=data.height,
+                    highlightthickness=0)
+    canvas.pack(fill=BOTH, expand=YES)
+    retainedCanvas = RetainedCanvas(canvas)
+    data.assets.afterIdle = canvas.after_idle
     root.bind("<Button-1>", lambda event:
                             mousePressedWrapper(event, canvas, data))
     root.bind("<Key>", lambda event:
                             keyPressedWrapper(event, canvas, data))
-    timerFiredWrapper(canvas, data)
+    for wheelEvent in ["<MouseWheel>", "<Button-4>", "<Button-5>"]:
+        root.bind(wheelEvent, lambda event:
+                            mouseWheelWrapper(event, canvas, data))
+    canvas.bind("<Configure>", lambda event:
+                            configureWrapper(event, canvas, data))
+    requestRedraw(canvas, data)
     root.mainloop()
+    data.journal.close()
+    if data.planPortfolio!=None: data.planPortfolio.close()
     print("bye!")
 
-run(500, 700)
+if __name__=="__main__":
+    run(500, 700)